@@ -18,17 +18,27 @@ with DAG(
 
     fetch = BashOperator(
         task_id="fetch",
-        bash_command="cd /opt/pipeline && python ingestion/fetch_weather.py",
+        # Run as modules so package imports (ingestion.*, transformations.*) resolve from the project root.
+        # python -m pipeline <stage> only imports that stage's module (fast task startup)
+        bash_command="cd /opt/pipeline && python -m pipeline fetch",
     )
     clean = BashOperator(
         task_id="clean",
-        bash_command="cd /opt/pipeline && python transformations/clean_weather.py",
+        bash_command="cd /opt/pipeline && python -m pipeline clean",
+    )
+    validate = BashOperator(
+        task_id="validate",
+        bash_command="cd /opt/pipeline && python -m pipeline validate",
+    )
+    compact = BashOperator(
+        task_id="compact",
+        bash_command="cd /opt/pipeline && python -m pipeline compact",
     )
     gold = BashOperator(
-        task_id="gold", bash_command="cd /opt/pipeline && python models/gold_weather.py"
+        task_id="gold", bash_command="cd /opt/pipeline && python -m pipeline gold"
     )
     load = BashOperator(
-        task_id="load", bash_command="cd /opt/pipeline && python loaders/load_to_pg.py"
+        task_id="load", bash_command="cd /opt/pipeline && python -m pipeline load"
     )
 
-    fetch >> clean >> gold >> load
+    fetch >> clean >> validate >> compact >> gold >> load
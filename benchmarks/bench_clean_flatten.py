@@ -0,0 +1,103 @@
+"""
+Row-wise vs columnar flattening of RAW payloads (clean step).
+
+    python -m benchmarks.bench_clean_flatten --cities 2000 --days 30
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from transformations.clean_weather import flatten_city_blobs
+
+
+def _synthetic_blobs(n_cities: int, n_days: int) -> list[dict]:
+    start = date(2025, 1, 1)
+    times = [(start + timedelta(days=i)).isoformat() for i in range(n_days)]
+    blobs = []
+    for c in range(n_cities):
+        tmax = [round(random.uniform(10, 35), 1) for _ in times]
+        blobs.append(
+            {
+                "_city_code": f"C{c:05d}",
+                "daily": {
+                    "time": times,
+                    "temperature_2m_max": tmax,
+                    "temperature_2m_min": [
+                        round(t - random.uniform(5, 12), 1) for t in tmax
+                    ],
+                    "precipitation_sum": [
+                        round(random.uniform(0, 20), 1) for _ in times
+                    ],
+                },
+            }
+        )
+    return blobs
+
+
+def _flatten_rowwise(blobs: list[dict], run_date: str) -> pd.DataFrame:
+    # Previous implementation: one dict per city-date, then pd.DataFrame(rows)
+    rows = []
+    for city_blob in blobs:
+        city = city_blob.get("_city_code")
+        daily = city_blob.get("daily", {})
+        for d, mx, mn, pc in zip(
+            daily.get("time", []),
+            daily.get("temperature_2m_max", []),
+            daily.get("temperature_2m_min", []),
+            daily.get("precipitation_sum", []),
+        ):
+            rows.append(
+                {
+                    "run_date": run_date,
+                    "city_code": city,
+                    "date": d,
+                    "temp_max": mx,
+                    "temp_min": mn,
+                    "precip_mm": pc,
+                }
+            )
+    df = pd.DataFrame(rows)
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df["temp_avg"] = (df["temp_max"] + df["temp_min"]) / 2
+    df["temp_range"] = df["temp_max"] - df["temp_min"]
+    return df
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    blobs = _synthetic_blobs(args.cities, args.days)
+    run_date = "2025-02-01"
+
+    old = _flatten_rowwise(blobs, run_date)
+    new = flatten_city_blobs(blobs, run_date)
+    pd.testing.assert_frame_equal(
+        old, new.assign(city_code=new["city_code"].astype(object))
+    )
+
+    t_old = _best_of(lambda: _flatten_rowwise(blobs, run_date), args.repeat)
+    t_new = _best_of(lambda: flatten_city_blobs(blobs, run_date), args.repeat)
+    print(f"rows={len(new)} cities={args.cities} days={args.days}")
+    print(f"row-wise : {t_old:.3f}s")
+    print(f"columnar : {t_new:.3f}s  ({t_old / t_new:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
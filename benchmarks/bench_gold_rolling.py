@@ -0,0 +1,70 @@
+"""
+Per-group lambda rolling vs the single-pass rolling engine (gold step).
+
+    python -m benchmarks.bench_gold_rolling --cities 10000 --days 60
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from models.gold_weather import _add_rolling
+
+
+def _lambda_rolling(daily: pd.DataFrame) -> pd.DataFrame:
+    # Previous implementation: one groupby-transform lambda per window/column
+    g = daily.groupby("city_code", observed=True)
+    daily["avg_max_7d"] = g["temp_max"].transform(
+        lambda s: s.rolling(7, min_periods=1).mean()
+    )
+    daily["avg_min_7d"] = g["temp_min"].transform(
+        lambda s: s.rolling(7, min_periods=1).mean()
+    )
+    daily["avg_max_14d"] = g["temp_max"].transform(
+        lambda s: s.rolling(14, min_periods=1).mean()
+    )
+    daily["avg_min_14d"] = g["temp_min"].transform(
+        lambda s: s.rolling(14, min_periods=1).mean()
+    )
+    return daily
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=60)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.cities * args.days
+    daily = pd.DataFrame(
+        {
+            "city_code": np.repeat(
+                [f"C{c:05d}" for c in range(args.cities)], args.days
+            ),
+            "date": np.tile(
+                pd.date_range("2025-01-01", periods=args.days), args.cities
+            ),
+            "temp_max": np.round(rng.uniform(10, 35, n), 1),
+            "temp_min": np.round(rng.uniform(0, 20, n), 1),
+        }
+    )
+
+    t0 = time.perf_counter()
+    old = _lambda_rolling(daily.copy())
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = _add_rolling(daily.copy(), windows=[7, 14])
+    t_new = time.perf_counter() - t0
+
+    cols = ["avg_max_7d", "avg_min_7d", "avg_max_14d", "avg_min_14d"]
+    np.testing.assert_allclose(old[cols].to_numpy(), new[cols].to_numpy(), atol=1e-9)
+    print(f"rows={n} cities={args.cities} days={args.days}")
+    print(f"lambda transforms : {t_old:.3f}s")
+    print(f"rolling engine    : {t_new:.3f}s  ({t_old / t_new:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+File size and in-memory size of SILVER / GOLD parquet: compact schema vs the
+previous pandas defaults (float64, timestamp dates, snappy).
+
+    python -m benchmarks.bench_storage --cities 500 --days 60 --runs 7
+
+Generates synthetic RAW (benchmarks/synthetic.py), runs clean + gold once, then
+rewrites every output the way it used to be written (plain DataFrame.to_parquet:
+float64 metrics, timestamp CLEAN dates, snappy) for comparison. Memory is the
+arrow size of the table as read back (pyarrow.parquet.read_table).
+"""
+
+import argparse
+import glob
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic import generate_raw
+from models import gold_weather as gw
+from transformations.clean_weather import clean_weather
+from transformations.storage import restore_metrics
+
+
+def _measure(path: str) -> dict:
+    t0 = time.perf_counter()
+    table = pq.read_table(path)
+    return {
+        "file_kb": round(os.path.getsize(path) / 1024, 1),
+        "mem_kb": round(table.nbytes / 1024, 1),
+        "read_s": round(time.perf_counter() - t0, 4),
+    }
+
+
+def compare(data_dir: str) -> pd.DataFrame:
+    """One row per output kind (CLEAN, GOLD files) with both layouts side by side."""
+    kinds = {
+        "clean": glob.glob(os.path.join(data_dir, "clean", "*", "weather.parquet"))
+    }
+    for name in [gw.DAILY_ENRICHED, gw.DAILY_KPIS, gw.MONTHLY_KPIS]:
+        kinds[name.split(".")[0]] = glob.glob(os.path.join(data_dir, "gold", "*", name))
+
+    rows = []
+    for kind, paths in kinds.items():
+        totals = {"kind": kind, "files": len(paths)}
+        for path in paths:
+            legacy = path + ".legacy"
+            df = restore_metrics(pd.read_parquet(path))
+            if kind == "clean":
+                df["date"] = pd.to_datetime(df["date"])
+            df.to_parquet(legacy, index=False)
+            for label, p in (("compact", path), ("legacy", legacy)):
+                for k, v in _measure(p).items():
+                    totals[f"{label}_{k}"] = totals.get(f"{label}_{k}", 0) + v
+        rows.append(totals)
+    out = pd.DataFrame(rows)
+    for k in ("file_kb", "mem_kb"):
+        out[f"{k}_ratio"] = (out[f"compact_{k}"] / out[f"legacy_{k}"]).round(2)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--cities", type=int, default=500)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--work-dir", help="Where data is generated (temp dir)")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    data_dir = tempfile.mkdtemp(prefix="bench_storage_", dir=args.work_dir)
+    os.environ["DATA_DIR"] = data_dir
+    gw.DATA_DIR = data_dir
+    try:
+        run_dates = generate_raw(data_dir, args.cities, args.days, args.runs)
+        for rd in run_dates:
+            clean_weather(rd)
+        gw.build_gold(run_dates[-1])
+        print(compare(data_dir).to_string(index=False))
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
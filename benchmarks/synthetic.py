@@ -0,0 +1,137 @@
+"""
+Synthetic RAW partitions shaped like Open-Meteo daily responses.
+
+    python -m benchmarks.synthetic --out /tmp/bench --cities 500 --days 30 --runs 7
+
+N cities x D days per payload x R run partitions. Consecutive runs slide by
+`step` days, so with the default step=1 each run overlaps the previous one by
+D-1 days (like the daily DAG). `null_rate` blanks that fraction of metric values.
+"""
+
+import argparse
+import json
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+from ingestion.raw_store import RAW_JSON, RawWriter
+
+
+def _city_codes(n: int) -> list[str]:
+    return [f"C{i:05d}" for i in range(n)]
+
+
+def city_payload(
+    code: str,
+    lat: float,
+    lon: float,
+    dates: list[str],
+    rng: np.random.Generator,
+    null_rate: float = 0.0,
+) -> dict:
+    """One city's response (same keys as the API + the _city_code tag added by fetch)."""
+    n = len(dates)
+    tmax = np.round(rng.normal(24, 6, n), 1)
+    tmin = np.round(tmax - rng.uniform(4, 14, n), 1)
+    prcp = np.round(rng.gamma(0.6, 4.0, n) * (rng.random(n) < 0.4), 1)
+
+    def _with_nulls(values: np.ndarray) -> list:
+        out: list = values.tolist()
+        if null_rate > 0:
+            for i in np.flatnonzero(rng.random(n) < null_rate):
+                out[i] = None
+        return out
+
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "generationtime_ms": 0.1,
+        "utc_offset_seconds": 0,
+        "timezone": "GMT",
+        "timezone_abbreviation": "GMT",
+        "elevation": 25.0,
+        "daily_units": {
+            "time": "iso8601",
+            "temperature_2m_max": "°C",
+            "temperature_2m_min": "°C",
+            "precipitation_sum": "mm",
+        },
+        "daily": {
+            "time": dates,
+            "temperature_2m_max": _with_nulls(tmax),
+            "temperature_2m_min": _with_nulls(tmin),
+            "precipitation_sum": _with_nulls(prcp),
+        },
+        "_city_code": code,
+    }
+
+
+def generate_raw(
+    base_dir: str,
+    cities: int,
+    days: int,
+    runs: int,
+    step: int = 1,
+    null_rate: float = 0.0,
+    first_run: str = "2025-01-01",
+    legacy_json: bool = False,
+    seed: int = 0,
+) -> list[str]:
+    """
+    Write R RAW partitions under base_dir/raw/<run_date>/ and return their run_dates.
+    Each run holds the `days` days before its run_date (end = run_date - 1).
+    legacy_json=True writes the old monolithic weather.json instead of NDJSON.
+    """
+    rng = np.random.default_rng(seed)
+    codes = _city_codes(cities)
+    coords = rng.uniform([-60, -180], [70, 180], size=(cities, 2)).round(2)
+    start = date.fromisoformat(first_run)
+    run_dates = []
+    for r in range(runs):
+        run_day = start + timedelta(days=r * step)
+        run_date = run_day.isoformat()
+        dates = [(run_day - timedelta(days=days - i)).isoformat() for i in range(days)]
+        payloads = (
+            city_payload(code, lat, lon, dates, rng, null_rate)
+            for code, (lat, lon) in zip(codes, coords)
+        )
+        if legacy_json:
+            raw_dir = os.path.join(base_dir, "raw", run_date)
+            os.makedirs(raw_dir, exist_ok=True)
+            with open(os.path.join(raw_dir, RAW_JSON), "w") as f:
+                json.dump({"run_date": run_date, "data": list(payloads)}, f)
+        else:
+            with RawWriter(base_dir, run_date) as writer:
+                for payload in payloads:
+                    writer.write(payload)
+        run_dates.append(run_date)
+    return run_dates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", required=True, help="DATA_DIR to write raw/ into")
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--step", type=int, default=1, help="Days between runs")
+    parser.add_argument("--null-rate", type=float, default=0.0)
+    parser.add_argument("--legacy-json", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run_dates = generate_raw(
+        args.out,
+        args.cities,
+        args.days,
+        args.runs,
+        step=args.step,
+        null_rate=args.null_rate,
+        legacy_json=args.legacy_json,
+        seed=args.seed,
+    )
+    print(f"RAW partitions written to {args.out}/raw: {', '.join(run_dates)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,24 @@
+import argparse
 import json
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, timedelta
+from typing import Iterator
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 
+if not __package__:
+    # Run as a script (python ingestion/fetch_weather.py): make the project root
+    # importable for the package imports below
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingestion.http_cache import ResponseCache
+from ingestion.raw_store import RawWriter
+from pipeline.metrics import file_bytes, track, write_metrics
+
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
@@ -11,28 +26,189 @@ logger = logging.getLogger(__name__)
 
 OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
 
+# Concurrency / retry knobs for the multi-city fetch
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "3"))
+FETCH_BACKOFF = float(os.getenv("FETCH_BACKOFF", "0.5"))
+# Number of coordinates sent per request (Open-Meteo accepts comma-separated lists)
+FETCH_BATCH_SIZE = int(os.getenv("FETCH_BATCH_SIZE", "50"))
+
+# Trailing window fetched for cities without a watermark (or on full refresh)
+DAYS_BACK = int(os.getenv("DAYS_BACK", "30"))
+# Oldest day a watermark backfill goes back to (days before today)
+FETCH_MAX_BACKFILL_DAYS = int(os.getenv("FETCH_MAX_BACKFILL_DAYS", "365"))
+# Days the API may still fill in: a null older than that is final and does not
+# hold the watermark back
+FETCH_SETTLE_DAYS = int(os.getenv("FETCH_SETTLE_DAYS", "7"))
+
+DAILY_VARIABLES = "temperature_2m_max,temperature_2m_min,precipitation_sum"
+
+# Local response cache (makes Airflow retries / manual reruns nearly free)
+FETCH_CACHE_TTL = float(os.getenv("FETCH_CACHE_TTL", "21600"))  # seconds, 0 = off
+FETCH_CACHE_MAX_MB = float(os.getenv("FETCH_CACHE_MAX_MB", "256"))
+
+
+def make_session(
+    pool_size: int = FETCH_WORKERS,
+    retries: int = FETCH_RETRIES,
+    backoff: float = FETCH_BACKOFF,
+) -> requests.Session:
+    """
+    HTTP session shared by the fetch workers.
+    - Keeps up to `pool_size` keep-alive connections open (one per worker).
+    - Retries connection errors, 429 and 5xx responses with exponential backoff.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _get_json(
+    params: dict,
+    session: requests.Session | None = None,
+    cache: ResponseCache | None = None,
+) -> dict | list:
+    """GET the forecast endpoint, going through the response cache when given."""
+    if cache is not None:
+        cached = cache.get(OPEN_METEO_URL, params)
+        if cached is not None:
+            return cached
+    get = session.get if session is not None else requests.get
+    resp = get(OPEN_METEO_URL, params=params, timeout=30)
+    resp.raise_for_status()
+    body = resp.json()
+    if cache is not None:
+        cache.put(OPEN_METEO_URL, params, body)
+    return body
+
 
 def fetch_city_weather(
-    city_code: str, lat: float, lon: float, start_date: str, end_date: str
+    city_code: str,
+    lat: float,
+    lon: float,
+    start_date: str,
+    end_date: str,
+    session: requests.Session | None = None,
+    cache: ResponseCache | None = None,
 ) -> dict:
     """Fetch daily weather for a city and attach metadata for the pipeline."""
     params = {
         "latitude": lat,
         "longitude": lon,
-        "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum",
+        "daily": DAILY_VARIABLES,
         "timezone": "auto",
         "start_date": start_date,
         "end_date": end_date,
     }
-    resp = requests.get(OPEN_METEO_URL, params=params, timeout=30)
-    resp.raise_for_status()
-    payload = resp.json()
+    payload = _get_json(params, session, cache)
     payload["_city_code"] = city_code
     payload["_start_date"] = start_date
     payload["_end_date"] = end_date
     return payload
 
 
+def fetch_cities_batch(
+    cities: list[tuple[str, float, float]],
+    start_date: str,
+    end_date: str,
+    session: requests.Session | None = None,
+    cache: ResponseCache | None = None,
+) -> list[dict]:
+    """
+    Fetch several cities with a single request and split the answer per city.
+    Each returned blob carries the same metadata keys as fetch_city_weather.
+    """
+    params = {
+        "latitude": ",".join(str(lat) for _, lat, _ in cities),
+        "longitude": ",".join(str(lon) for _, _, lon in cities),
+        "daily": DAILY_VARIABLES,
+        "timezone": "auto",
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    body = _get_json(params, session, cache)
+    # One location → single object; several → list in request order
+    payloads = body if isinstance(body, list) else [body]
+    if len(payloads) != len(cities):
+        raise ValueError(
+            f"Expected {len(cities)} locations in batch response, got {len(payloads)}"
+        )
+    for (code, _, _), payload in zip(cities, payloads):
+        payload["_city_code"] = code
+        payload["_start_date"] = start_date
+        payload["_end_date"] = end_date
+    return payloads
+
+
+def iter_cities_concurrent(
+    cities: list[tuple[str, float, float]],
+    start_date: str,
+    end_date: str,
+    max_workers: int = FETCH_WORKERS,
+    session: requests.Session | None = None,
+    batch_size: int = FETCH_BATCH_SIZE,
+    cache: ResponseCache | None = None,
+    ordered: bool = False,
+) -> Iterator[dict]:
+    """
+    Fetch many cities in parallel over one pooled session, yielding payloads
+    as their request completes (or in the order of `cities` when ordered=True).
+    - Cities are grouped in chunks of `batch_size` coordinates per request
+      (batch_size=1 → one request per city).
+    - At most `max_workers` requests are in flight.
+    """
+    own_session = session is None
+    session = session or make_session(pool_size=max_workers)
+    batch_size = max(1, batch_size)
+    chunks = [cities[i : i + batch_size] for i in range(0, len(cities), batch_size)]
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(
+                    fetch_cities_batch, chunk, start_date, end_date, session, cache
+                )
+                for chunk in chunks
+            ]
+            for f in futures if ordered else as_completed(futures):
+                yield from f.result()
+    finally:
+        if own_session:
+            session.close()
+
+
+def fetch_cities_concurrent(
+    cities: list[tuple[str, float, float]],
+    start_date: str,
+    end_date: str,
+    max_workers: int = FETCH_WORKERS,
+    session: requests.Session | None = None,
+    batch_size: int = FETCH_BATCH_SIZE,
+    cache: ResponseCache | None = None,
+) -> list[dict]:
+    """All payloads of iter_cities_concurrent, in the order of `cities`."""
+    return list(
+        iter_cities_concurrent(
+            cities,
+            start_date,
+            end_date,
+            max_workers=max_workers,
+            session=session,
+            batch_size=batch_size,
+            cache=cache,
+            ordered=True,
+        )
+    )
+
+
 def _default_cities():
     # (city_code, lat, lon)
     return [
@@ -43,29 +219,201 @@ def _default_cities():
     ]
 
 
-def main():
+# --------------------
+# Incremental state (per-city high-water mark)
+# --------------------
+
+
+def _watermarks_path(base_dir: str) -> str:
+    return os.path.join(base_dir, "state", "fetch_watermarks.json")
+
+
+def load_watermarks(base_dir: str) -> dict[str, str]:
+    """Last fully fetched date per city_code ({} when no state exists yet)."""
+    path = _watermarks_path(base_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_watermarks(base_dir: str, watermarks: dict[str, str]) -> None:
+    path = _watermarks_path(base_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)  # atomic: never leave a half-written state file
+
+
+def plan_fetch_ranges(
+    cities: list[tuple[str, float, float]],
+    watermarks: dict[str, str],
+    today: date,
+    days_back: int = DAYS_BACK,
+    full_refresh: bool = False,
+    max_backfill_days: int = FETCH_MAX_BACKFILL_DAYS,
+) -> dict[tuple[str, str], list[tuple[str, float, float]]]:
+    """
+    Decide which dates each city still needs, grouped by (start_date, end_date)
+    so cities sharing a range can go in the same batch request.
+    - No watermark (or full_refresh) → trailing `days_back` window.
+    - Watermark → day after it (this backfills missed runs), but no further back
+      than `max_backfill_days`.
+    - Cities already up to date are left out.
+    """
+    end = today - timedelta(days=1)
+    window_start = today - timedelta(days=days_back)
+    # Never later than the trailing window itself (DAYS_BACK history loads)
+    floor = min(today - timedelta(days=max_backfill_days), window_start)
+    plan: dict[tuple[str, str], list[tuple[str, float, float]]] = {}
+    for city in cities:
+        mark = None if full_refresh else watermarks.get(city[0])
+        start = date.fromisoformat(mark) + timedelta(days=1) if mark else window_start
+        if start < floor:
+            logger.warning(
+                f"{city[0]}: watermark {mark} is before {floor}, "
+                f"backfilling from {floor} only"
+            )
+            start = floor
+        if start > end:
+            continue
+        plan.setdefault((start.isoformat(), end.isoformat()), []).append(city)
+    return plan
+
+
+def _last_complete_day(payload: dict, settled_before: str = "") -> str | None:
+    """
+    Last date of the leading run of days with all metrics present.
+    Days after the first null are not marked as fetched, so they are requested
+    again (gap backfill) on the next run. Nulls on days before `settled_before`
+    are final (the API will not fill them) and do not stop the run.
+    """
+    daily = payload.get("daily", {})
+    last = None
+    for d, mx, mn, pc in zip(
+        daily.get("time", []),
+        daily.get("temperature_2m_max", []),
+        daily.get("temperature_2m_min", []),
+        daily.get("precipitation_sum", []),
+    ):
+        if (mx is None or mn is None or pc is None) and d >= settled_before:
+            break
+        last = d
+    return last
+
+
+def _open_cache(base_dir: str) -> ResponseCache | None:
+    if FETCH_CACHE_TTL <= 0:
+        return None
+    return ResponseCache(
+        os.path.join(base_dir, "cache", "http"),
+        ttl_seconds=FETCH_CACHE_TTL,
+        max_bytes=int(FETCH_CACHE_MAX_MB * 1024 * 1024),
+    )
+
+
+def iter_planned(
+    plan: dict[tuple[str, str], list[tuple[str, float, float]]],
+    cache: ResponseCache | None = None,
+) -> Iterator[dict]:
+    """Yield the payload of every planned city as it arrives."""
+    for (start_date, end_date), group in sorted(plan.items()):
+        logger.info(
+            f"Fetching {len(group)} cities for {start_date} → {end_date} "
+            f"with {FETCH_WORKERS} workers, batch_size={FETCH_BATCH_SIZE}"
+        )
+        for payload in iter_cities_concurrent(group, start_date, end_date, cache=cache):
+            code = payload["_city_code"]
+            logger.info(f"{code}: Retrieved {len(payload['daily']['time'])} days")
+            yield payload
+
+
+def _advance_watermark(watermarks: dict[str, str], payload: dict, today: date) -> None:
+    settled = today - timedelta(days=FETCH_SETTLE_DAYS)
+    last = _last_complete_day(payload, settled.isoformat())
+    code = payload["_city_code"]
+    if last and last > watermarks.get(code, ""):
+        watermarks[code] = last
+
+
+def fetch_in_memory(today: date, full_refresh: bool = False) -> list[dict]:
+    """
+    Fetch what the watermarks say is missing, without writing RAW or moving the
+    watermarks (see persist_raw). Used by the in-process pipeline runner.
+    """
+    BASE_DIR = os.getenv("DATA_DIR", "./data")
+    plan = plan_fetch_ranges(
+        _default_cities(), load_watermarks(BASE_DIR), today, full_refresh=full_refresh
+    )
+    if not plan:
+        logger.info("All cities are up to date, nothing to fetch")
+        return []
+    cache = _open_cache(BASE_DIR)
+    payloads = list(iter_planned(plan, cache))
+    if cache is not None:
+        cache.log_report()
+    return payloads
+
+
+def persist_raw(run_date: str, payloads: list[dict]) -> str:
+    """Write fetched payloads to RAW, then advance the watermarks of those cities."""
+    BASE_DIR = os.getenv("DATA_DIR", "./data")
+    watermarks = load_watermarks(BASE_DIR)
+    replace = [p["_city_code"] for p in payloads]
+    with RawWriter(BASE_DIR, run_date, replace=replace) as writer:
+        for payload in payloads:
+            writer.write(payload)
+            _advance_watermark(watermarks, payload, date.fromisoformat(run_date))
+    save_watermarks(BASE_DIR, watermarks)
+    logger.info(f"RAW saved: {writer.path} cities={writer.count}")
+    return writer.path
+
+
+def main(full_refresh: bool = False):
     BASE_DIR = os.getenv("DATA_DIR", "./data")
-    run_date = date.today().isoformat()
-    start_date = (date.today() - timedelta(days=30)).isoformat()
-    end_date = (date.today() - timedelta(days=1)).isoformat()
+    today = date.today()
+    run_date = today.isoformat()
     logger.info("Starting fetch_weather pipeline")
-    logger.info(f"Run date: {run_date}, Range: {start_date} → {end_date}")
-
-    data = []
-    for code, lat, lon in _default_cities():
-        logger.info(f"Fetching city={code} lat={lat} lon={lon}")
-        payload = fetch_city_weather(code, lat, lon, start_date, end_date)
-        logger.info(f"{code}: Retrieved {len(payload['daily']['time'])} days")
-        data.append(payload)
-
-    raw_dir = os.path.join(BASE_DIR, "raw", run_date)
-    os.makedirs(raw_dir, exist_ok=True)
-    out_path = os.path.join(raw_dir, "weather.json")
-    with open(out_path, "w") as f:
-        json.dump({"run_date": run_date, "data": data}, f)
-    logger.info(f"RAW saved: {out_path}")
+    logger.info(f"Run date: {run_date}, full_refresh={full_refresh}")
+
+    cities = _default_cities()
+    watermarks = load_watermarks(BASE_DIR)
+    plan = plan_fetch_ranges(cities, watermarks, today, full_refresh=full_refresh)
+    if not plan:
+        logger.info("All cities are up to date, nothing to fetch")
+        return
+
+    cache = _open_cache(BASE_DIR)
+
+    # Stream each city to RAW as soon as it arrives (a same-day rerun only
+    # replaces the cities it refetches)
+    planned = [code for group in plan.values() for code, _, _ in group]
+    with track("fetch", cities=len(planned)) as rec:
+        days = 0
+        with RawWriter(BASE_DIR, run_date, replace=planned) as writer:
+            for payload in iter_planned(plan, cache):
+                writer.write(payload)
+                days += len(payload["daily"]["time"])
+                # Watermarks only move for cities already flushed to RAW
+                _advance_watermark(watermarks, payload, today)
+        rec.update(rows_out=days, bytes_written=file_bytes(writer.path))
+    if cache is not None:
+        cache.log_report()
+    logger.info(f"RAW saved: {writer.path} cities={writer.count}")
+
+    save_watermarks(BASE_DIR, watermarks)
+    write_metrics(BASE_DIR, run_date, "fetch")
     logger.info("fetch_weather pipeline finished OK")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fetch RAW weather data")
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        default=os.getenv("FETCH_FULL_REFRESH", "0") == "1",
+        help=f"Ignore watermarks and re-pull the trailing {DAYS_BACK} days",
+    )
+    args = parser.parse_args()
+    main(full_refresh=args.full_refresh)
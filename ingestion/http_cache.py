@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    On-disk cache for Open-Meteo JSON responses.
+    - Key: sha256 of the request URL + params (city coordinates, date range, daily variables).
+    - Entries older than `ttl_seconds` are treated as misses and removed.
+    - When the cache grows past `max_bytes`, least recently used entries are evicted
+      (a hit refreshes the file mtime, so mtime order == LRU order).
+    - Each entry stores a sha256 of its body; corrupted entries are dropped.
+    """
+
+    def __init__(self, cache_dir: str, ttl_seconds: float, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    @staticmethod
+    def key(url: str, params: dict) -> str:
+        raw = json.dumps({"url": url, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _entries(self) -> list[tuple[str, float, int]]:
+        out = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            out.append((path, st.st_mtime, st.st_size))
+        return out
+
+    def _drop(self, path: str) -> None:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._size -= size
+
+    def get(self, url: str, params: dict) -> dict | list | None:
+        path = self._path(self.key(url, params))
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            entry = None
+
+        if entry is not None:
+            expired = time.time() - entry.get("stored_at", 0) > self.ttl_seconds
+            body = entry.get("body", "")
+            corrupted = hashlib.sha256(body.encode()).hexdigest() != entry.get("sha256")
+            if expired or corrupted:
+                self._drop(path)
+                entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            pass  # evicted by another thread's put() since the read
+        return json.loads(entry["body"])
+
+    def put(self, url: str, params: dict, payload: dict | list) -> None:
+        body = json.dumps(payload)
+        entry = {
+            "stored_at": time.time(),
+            "url": url,
+            "params": params,
+            "sha256": hashlib.sha256(body.encode()).hexdigest(),
+            "body": body,
+        }
+        path = self._path(self.key(url, params))
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        new_size = os.path.getsize(tmp_path)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size += new_size - old_size
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self._evict(keep=path)
+
+    def _evict(self, keep: str) -> None:
+        # Oldest mtime first = least recently used
+        for path, _, _ in sorted(self._entries(), key=lambda e: e[1]):
+            with self._lock:
+                if self._size <= self.max_bytes:
+                    return
+            if path == keep:
+                continue
+            self._drop(path)
+            with self._lock:
+                self.evictions += 1
+
+    def log_report(self) -> None:
+        total = self.hits + self.misses
+        ratio = self.hits / total if total else 0.0
+        logger.info(
+            f"HTTP cache: hits={self.hits} misses={self.misses} "
+            f"hit_ratio={ratio:.0%} evictions={self.evictions} "
+            f"size={self._size / 1e6:.1f}MB dir={self.cache_dir}"
+        )
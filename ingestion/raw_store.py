@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+from typing import Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# RAW layout: data/raw/<run_date>/weather.ndjson → one city payload per line.
+# Older partitions hold a single weather.json ({"run_date": ..., "data": [...]}).
+RAW_NDJSON = "weather.ndjson"
+RAW_JSON = "weather.json"
+
+
+def raw_path(base_dir: str, run_date: str) -> str:
+    """Path of the RAW file for a run_date (NDJSON if present, legacy JSON otherwise)."""
+    raw_dir = os.path.join(base_dir, "raw", run_date)
+    ndjson = os.path.join(raw_dir, RAW_NDJSON)
+    legacy = os.path.join(raw_dir, RAW_JSON)
+    if not os.path.exists(ndjson) and os.path.exists(legacy):
+        return legacy
+    return ndjson
+
+
+def iter_city_blobs(path: str) -> Iterator[dict]:
+    """Yield city payloads one at a time, without loading the whole file."""
+    if path.endswith(".json"):
+        # Legacy monolithic file: has to be parsed at once
+        with open(path, "r") as f:
+            yield from json.load(f).get("data", [])
+        return
+
+    with open(path, "r") as f:
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Only expected for the last line of a fetch that crashed mid-write
+                logger.warning(f"Skipping truncated RAW line {lineno} in {path}")
+
+
+class RawWriter:
+    """
+    Append-only NDJSON writer: each city is flushed to disk as soon as it arrives,
+    so a crashed fetch keeps every city it already finished.
+
+    Cities listed in `replace` are dropped from an existing file first
+    (same-day rerun refetching them); the rest of the file is kept.
+    """
+
+    def __init__(self, base_dir: str, run_date: str, replace: Iterable[str] = ()):
+        raw_dir = os.path.join(base_dir, "raw", run_date)
+        os.makedirs(raw_dir, exist_ok=True)
+        self.path = os.path.join(raw_dir, RAW_NDJSON)
+        self.count = 0
+        self._drop_cities(set(replace))
+        self._f = open(self.path, "a")
+
+    def _drop_cities(self, cities: set[str]) -> None:
+        if not cities or not os.path.exists(self.path):
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as out:
+            for blob in iter_city_blobs(self.path):
+                if blob.get("_city_code") not in cities:
+                    out.write(json.dumps(blob) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def write(self, payload: dict) -> None:
+        self._f.write(json.dumps(payload) + "\n")
+        self._f.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> "RawWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,282 @@
+import argparse
+import datetime
+import logging
+import os
+from typing import Sequence
+
+import pandas as pd
+from sqlalchemy import text
+
+from loaders import load_to_pg as lp
+from models import gold_weather as gw
+from pipeline.metrics import track, write_metrics
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# SQL engine for GOLD: the same outputs as models/gold_weather.py, computed inside
+# Postgres from weather.weather_silver (one row per city & date) and written with
+# INSERT ... SELECT. That holds when weather_silver was loaded from the compacted
+# store (last run wins, like the pandas path reads it). Loaded from daily CLEAN
+# partitions it keeps the first run's row of every city & date while pandas reads
+# all runs: _build_gold_sql logs a warning then. Column semantics follow the
+# pandas path:
+# - daily: max / min / mean / mean / sum over the SILVER rows of a city-date
+#   (temp_range from temp_max - temp_min: the loader does not ship it)
+# - rolling: mean of the last w rows per city, NULLs skipped (min_periods=1),
+#   summed exactly (numeric) like _rolling_means so ties round the same way
+# - prior periods: same day one week / month / year earlier, month ends clamped
+#   (date - interval '1 month' does what _shift_back does)
+# - rounding: round(x * 10) / 10 on double precision is rint(x * 10) / 10, which
+#   is exactly numpy's round(x, 1)
+# - monthly means / sums: summed exactly (numeric) then divided in double, like
+#   pandas' compensated groupby sums. A mean of 1-decimal values lands exactly on
+#   a .x5 tie often, so the summation order decides how it rounds.
+SILVER_TABLE = "weather.weather_silver"
+# Load manifest paths of weather_silver files taken from daily CLEAN partitions
+CLEAN_PREFIX = "clean" + os.sep
+
+
+def _round(expr: str) -> str:
+    return f"round(({expr}) * 10) / 10"
+
+
+def _rolling_mean(col: str, window: int) -> str:
+    # Exact numeric sum of the window rows (NULLs skipped), like the integer sums
+    # of _rolling_means
+    over = (
+        "OVER (PARTITION BY b.city_code ORDER BY b.date "
+        f"ROWS BETWEEN {window - 1} PRECEDING AND CURRENT ROW)"
+    )
+    return (
+        f"(sum((b.{col})::text::numeric) {over})::float8 "
+        f"/ nullif(count(b.{col}) {over}, 0)"
+    )
+
+
+def _exact_mean(col: str) -> str:
+    # float8 → text is the shortest round-trip form, so the numeric sum is exact
+    return f"sum(({col})::text::numeric)::float8 / count({col})"
+
+
+def _exact_sum(col: str) -> str:
+    return f"coalesce(sum(({col})::text::numeric)::float8, 0)"
+
+
+def _interval(horizon: str) -> str:
+    return {"week": "7 days", "month": "1 month", "year": "1 year"}[horizon]
+
+
+def daily_sql(
+    windows: Sequence[int] | None = None, horizons: Sequence[str] | None = None
+) -> str:
+    """SELECT of the GOLD daily enriched rows (gold_weather DAILY_ENRICHED columns)."""
+    windows = sorted(set(windows or gw.ROLLING_WINDOWS))
+    horizons = gw.COMPARE_HORIZONS if horizons is None else horizons
+    unknown = set(horizons) - set(gw.COMPARE_SUFFIXES)
+    if unknown:
+        raise ValueError(f"Unknown comparison horizons {sorted(unknown)}")
+
+    cols = [
+        "b.city_code",
+        "b.date",
+        *(f"{_round(f'b.{c}')} AS {c}" for c in gw.BASE_COLUMNS[2:]),
+    ]
+    for w in windows:
+        for col, prefix in gw.ROLLING_COLUMNS.items():
+            cols.append(f"{_round(_rolling_mean(col, w))} AS {prefix}_{w}d")
+
+    joins = []
+    for h in horizons:
+        value_sfx, pct_sfx = gw.COMPARE_SUFFIXES[h]
+        alias = f"p_{value_sfx}"
+        joins.append(
+            f"LEFT JOIN base {alias} ON {alias}.city_code = b.city_code "
+            f"AND {alias}.date = (b.date - interval '{_interval(h)}')::date"
+        )
+        for col in gw.COMPARE_COLUMNS:
+            cols.append(f"{_round(f'{alias}.{col}')} AS {col}_{value_sfx}")
+        for col in gw.COMPARE_COLUMNS:
+            # Variations % (avoiding zero divisions)
+            pct = f"(b.{col} - {alias}.{col}) / nullif({alias}.{col}, 0) * 100"
+            cols.append(f"{_round(pct)} AS {col}_{pct_sfx}")
+
+    select = ",\n  ".join(cols)
+    return f"""WITH base AS (
+  SELECT city_code, date,
+         max(temp_max) AS temp_max,
+         min(temp_min) AS temp_min,
+         {_exact_mean('temp_avg')} AS temp_avg,
+         {_exact_mean('temp_max - temp_min')} AS temp_range,
+         {_exact_sum('precip_mm')} AS precip_mm
+  FROM {SILVER_TABLE}
+  GROUP BY city_code, date
+)
+SELECT
+  {select}
+FROM base b
+{chr(10).join(joins)}
+ORDER BY b.city_code, b.date"""
+
+
+def monthly_sql() -> str:
+    """SELECT of the GOLD monthly KPIs (gold_weather MONTHLY_KPIS columns)."""
+    return f"""SELECT city_code, to_char(date, 'YYYY-MM') AS month,
+  {_round(_exact_mean('temp_min'))} AS avg_temp_min,
+  {_round(_exact_mean('temp_max'))} AS avg_temp_max,
+  {_round(_exact_mean('temp_avg'))} AS avg_temp_avg,
+  {_round(_exact_sum('precip_mm'))} AS total_precip
+FROM {SILVER_TABLE}
+GROUP BY 1, 2
+ORDER BY 1, 2"""
+
+
+def gold_frames() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """(daily_kpi, monthly_kpi) computed in Postgres, shaped like gold_from_silver's."""
+    daily = pd.read_sql(text(daily_sql()), lp.get_engine(), parse_dates=["date"])
+    monthly = pd.read_sql(text(monthly_sql()), lp.get_engine())
+    return daily, monthly
+
+
+def _upsert_sql(table: str, columns: list[str], keys: list[str], select: str) -> str:
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c not in keys)
+    return (
+        f"INSERT INTO weather.{table} ({', '.join(columns)})\n{select}\n"
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+    )
+
+
+def build_gold_sql(run_date: str | None = None) -> dict[str, int]:
+    """
+    Rebuild GOLD inside Postgres from weather.weather_silver, in one transaction:
+      - weather.weather_daily / weather_monthly_kpis / weather_daily_kpis are
+        upserted (INSERT ... SELECT ... ON CONFLICT DO UPDATE) with run_date
+      - weather.weather_daily_enriched (rolling + prior-period columns, which
+        depend on GOLD_ROLLING_WINDOWS / GOLD_COMPARE_HORIZONS) is recreated
+    On the partitioned schema (sql/init_partitioned.sql) the monthly partitions
+    are created first and the rollup is refreshed after.
+    Returns rows written per table.
+    """
+    run_date = run_date or datetime.date.today().isoformat()
+    with track("gold", engine="sql") as rec:
+        counts = _build_gold_sql(run_date)
+        rec.update(rows_out=counts.get("weather_daily_enriched", 0), tables=counts)
+    write_metrics(gw.DATA_DIR, run_date, "gold")
+    logger.info(f"GOLD (sql engine) for run_date={run_date}: {counts}")
+    return counts
+
+
+def silver_from_partitions() -> bool:
+    """True when the load manifest shows weather_silver rows from CLEAN partitions."""
+    with lp.get_engine().begin() as conn:
+        loaded = lp.read_manifest(conn, "weather_silver")
+    return any(p.startswith(CLEAN_PREFIX) for p in loaded)
+
+
+def _build_gold_sql(run_date: str) -> dict[str, int]:
+    params = {"run_date": run_date}
+    counts: dict[str, int] = {}
+    with lp.get_engine().connect() as conn:
+        lo, hi = conn.execute(
+            text(f"SELECT min(date), max(date) FROM {SILVER_TABLE}")
+        ).one()
+    if lo is None:
+        logger.warning(f"{SILVER_TABLE} is empty: nothing to build")
+        return counts
+    if silver_from_partitions():
+        logger.warning(
+            f"{SILVER_TABLE} was loaded from daily CLEAN partitions: it keeps the "
+            "first run of every city-date, so GOLD will differ from the pandas "
+            "build. Load it from the compacted store (compact_silver) to match."
+        )
+    lp.ensure_partitions("weather_daily", lo, hi)
+
+    with lp.get_engine().begin() as conn:
+        with track("gold.sql_daily") as step:
+            conn.execute(
+                text(f"CREATE TEMP TABLE _gold_daily ON COMMIT DROP AS\n{daily_sql()}")
+            )
+            counts["weather_daily"] = conn.execute(
+                text(
+                    _upsert_sql(
+                        "weather_daily",
+                        ["run_date", *gw.BASE_COLUMNS],
+                        ["city_code", "date"],
+                        "SELECT CAST(:run_date AS date), "
+                        f"{', '.join(gw.BASE_COLUMNS)} FROM _gold_daily",
+                    )
+                ),
+                params,
+            ).rowcount
+            # Like the loader: first row (earliest date) per city for this run
+            counts["weather_daily_kpis"] = conn.execute(
+                text(
+                    _upsert_sql(
+                        "weather_daily_kpis",
+                        [
+                            "run_date",
+                            "city_code",
+                            "avg_temp_min",
+                            "avg_temp_max",
+                            "avg_precip_mm",
+                        ],
+                        ["city_code", "run_date"],
+                        "SELECT DISTINCT ON (city_code) CAST(:run_date AS date), "
+                        "city_code, temp_min, temp_max, precip_mm "
+                        "FROM _gold_daily ORDER BY city_code, date",
+                    )
+                ),
+                params,
+            ).rowcount
+            conn.execute(text("DROP TABLE IF EXISTS weather.weather_daily_enriched"))
+            counts["weather_daily_enriched"] = conn.execute(
+                text(
+                    "CREATE TABLE weather.weather_daily_enriched AS "
+                    "SELECT CAST(:run_date AS date) AS run_date, * FROM _gold_daily"
+                ),
+                params,
+            ).rowcount
+            conn.execute(
+                text(
+                    "ALTER TABLE weather.weather_daily_enriched "
+                    "ADD PRIMARY KEY (city_code, date)"
+                )
+            )
+            step["rows_out"] = counts["weather_daily_enriched"]
+        with track("gold.sql_monthly") as step:
+            counts["weather_monthly_kpis"] = conn.execute(
+                text(
+                    _upsert_sql(
+                        "weather_monthly_kpis",
+                        [
+                            "run_date",
+                            "city_code",
+                            "month",
+                            "avg_temp_min",
+                            "avg_temp_max",
+                            "avg_temp_avg",
+                            "total_precip",
+                        ],
+                        ["city_code", "month"],
+                        "SELECT CAST(:run_date AS date), m.* "
+                        f"FROM ({monthly_sql()}) m",
+                    )
+                ),
+                params,
+            ).rowcount
+            step["rows_out"] = counts["weather_monthly_kpis"]
+    lp.refresh_rollups("weather_daily", [(lo, hi)])
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build GOLD inside Postgres from weather.weather_silver"
+    )
+    parser.add_argument(
+        "--run-date", help="run_date stamped on the rows (default: today)"
+    )
+    args = parser.parse_args()
+    build_gold_sql(args.run_date)
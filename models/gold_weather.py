@@ -1,8 +1,38 @@
+import argparse
 import datetime
-import glob
+import json
 import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+import pyarrow.dataset as ds
 import logging
+from typing import Callable, Sequence
+
+if not __package__:
+    # Run as a script (python models/gold_weather.py): make the project root
+    # importable for the package imports below
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline.metrics import file_bytes, track, write_metrics
+from transformations.silver_store import (
+    SILVER_SCHEMA,
+    anti_join,
+    missing_columns,
+    read_silver,
+    silver_dataset,
+    silver_paths,
+    store_paths,
+    use_compacted,
+)
+from transformations.storage import (
+    STORED_DECIMALS,
+    ParquetAppender,
+    read_compact,
+    write_compact,
+)
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -12,49 +42,62 @@ logger = logging.getLogger(__name__)
 DATA_DIR = os.getenv("DATA_DIR", "./data")
 
 
-def build_gold(run_date: str | None = None) -> str:
-    logger.info("Starting gold_weather()")
-    """
-    Brief explanation of the GOLD layer builder:
-      - Reads all SILVER (clean) partitions (data/clean/*/weather.parquet)
-      - Builds daily KPIs (with 7d/14d rolling) and YoY same-day deltas
-      - Builds monthly aggregates
-      - Saves GOLD outputs partitioned by run_date
-    """
-    # 1) Reading all clean partitions
-    clean_paths = glob.glob(os.path.join(DATA_DIR, "clean", "*", "weather.parquet"))
-    if not clean_paths:
-        print("No clean (silver) files found.")
-        return ""
-    df = pd.concat([pd.read_parquet(p) for p in clean_paths], ignore_index=True)
-    logger.info(f"SILVER combined shape: {df.shape}")
-
-    # Basic validations
-    needed = {
-        "run_date",
-        "city_code",
-        "date",
-        "temp_max",
-        "temp_min",
-        "temp_avg",
-        "temp_range",
-        "precip_mm",
-    }
-    missing = needed - set(df.columns)
-    if missing:
-        print(f"Missing required columns for GOLD: {missing}")
-        return ""
+SILVER_COLUMNS = {
+    "run_date",
+    "city_code",
+    "date",
+    "temp_max",
+    "temp_min",
+    "temp_avg",
+    "temp_range",
+    "precip_mm",
+}
+# Unrounded daily aggregates: what rolling windows and YoY are computed from
+BASE_COLUMNS = [
+    "city_code",
+    "date",
+    "temp_max",
+    "temp_min",
+    "temp_avg",
+    "temp_range",
+    "precip_mm",
+]
+# Rolling windows (rows per city) and the metrics they average
+ROLLING_WINDOWS = sorted(
+    {int(w) for w in os.getenv("GOLD_ROLLING_WINDOWS", "7,14").split(",")}
+)
+ROLLING_COLUMNS = {"temp_max": "avg_max", "temp_min": "avg_min"}
+# Largest rolling window: rows of history a recomputed row needs before it
+MAX_WINDOW = max(ROLLING_WINDOWS)
+# Prior-period comparisons (GOLD_COMPARE_HORIZONS="week,month,year"):
+# horizon → suffixes of the prior value and of the % change columns
+COMPARE_SUFFIXES = {
+    "week": ("lw", "wow_pct"),
+    "month": ("lm", "mom_pct"),
+    "year": ("ly", "yoy_pct"),
+}
+COMPARE_HORIZONS = [
+    h.strip()
+    for h in os.getenv("GOLD_COMPARE_HORIZONS", "year").split(",")
+    if h.strip()
+]
+COMPARE_COLUMNS = ["temp_min", "temp_max"]
+# Full builds with GOLD_WORKERS > 1 split cities into GOLD_SHARDS (default: one
+# per worker) hash shards and compute each shard in its own process
+GOLD_WORKERS = int(os.getenv("GOLD_WORKERS", "1"))
+GOLD_SHARDS = int(os.getenv("GOLD_SHARDS", "0")) or None
+# Full builds with GOLD_MEMORY_MB > 0 stream: cities are processed in batches
+# whose SILVER rows fit the budget and the outputs are appended batch by batch
+# (see gold_streaming). GOLD_BYTES_PER_ROW is the peak memory per SILVER row
+# while a batch goes through gold_from_silver (~550 measured with the defaults).
+GOLD_MEMORY_MB = int(os.getenv("GOLD_MEMORY_MB", "0"))
+GOLD_BYTES_PER_ROW = int(os.getenv("GOLD_BYTES_PER_ROW", "600"))
 
-    # 2) Ensure dtypes and helpers
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"]).copy()
-    df["yyyymm"] = df["date"].dt.to_period("M").astype(str)
 
-    # --------------------
-    # DAILY KPIs (city-date)
-    # --------------------
-    daily_kpi = (
-        df.groupby(["city_code", "date"], dropna=False)
+def _daily_base(df: pd.DataFrame) -> pd.DataFrame:
+    """DAILY KPIs (city-date): collapse the overlapping SILVER runs."""
+    return (
+        df.groupby(["city_code", "date"], dropna=False, observed=True)
         .agg(
             temp_max=("temp_max", "max"),
             temp_min=("temp_min", "min"),
@@ -66,54 +109,168 @@ def build_gold(run_date: str | None = None) -> str:
         .sort_values(["city_code", "date"])
     )
 
-    # 2.a Rolling 7d / 14d (by city)
-    daily_kpi["avg_max_7d"] = daily_kpi.groupby("city_code")["temp_max"].transform(
-        lambda s: s.rolling(7, min_periods=1).mean()
-    )
-    daily_kpi["avg_min_7d"] = daily_kpi.groupby("city_code")["temp_min"].transform(
-        lambda s: s.rolling(7, min_periods=1).mean()
-    )
-    daily_kpi["avg_max_14d"] = daily_kpi.groupby("city_code")["temp_max"].transform(
-        lambda s: s.rolling(14, min_periods=1).mean()
-    )
-    daily_kpi["avg_min_14d"] = daily_kpi.groupby("city_code")["temp_min"].transform(
-        lambda s: s.rolling(14, min_periods=1).mean()
-    )
 
-    # 2.b YoY same-day (shift by 1 year)
-    prev = daily_kpi[["city_code", "date", "temp_min", "temp_max"]].copy()
+def _rolling_means(
+    values: np.ndarray, pos: np.ndarray, windows: Sequence[int]
+) -> dict[int, np.ndarray]:
+    """
+    Trailing means for every window (min_periods=1, NaNs skipped), O(rows) for
+    any window size: differences of per-column prefix sums of values and counts.
+    - values: (rows, columns) array sorted by city_code, date
+    - pos: each row's position within its city (windows never cross cities)
+    Sums are exact: values are taken with STORED_DECIMALS decimals (what SILVER
+    stores), added up as integers, and each mean is rounded once
+    (sum / 10**d / count). The result then depends neither on where the frame
+    starts (incremental builds), nor on the order of the additions (SQL engine:
+    exact numeric sums), nor on float noise of in-memory frames (runner).
+    """
+    scale = 10**STORED_DECIMALS
+    valid = ~np.isnan(values)
+    scaled = np.round(np.where(valid, values, 0.0) * scale).astype(np.int64)
 
-    # Mapping date to previous year
-    prev["date"] = prev["date"] + pd.DateOffset(years=1)
-    prev = prev.rename(columns={"temp_min": "temp_min_ly", "temp_max": "temp_max_ly"})
+    n = values.shape[0]
+    total = np.zeros((n + 1, values.shape[1]), dtype=np.int64)
+    count = np.zeros((n + 1, values.shape[1]), dtype=np.int64)
+    np.cumsum(scaled, axis=0, out=total[1:])
+    np.cumsum(valid, axis=0, out=count[1:])
+    end = np.arange(1, n + 1)
+    out = {}
+    for w in windows:
+        # Window of row i: rows start..i of the same city
+        start = end - 1 - np.minimum(pos, w - 1)
+        sums = total[end] - total[start]
+        counts = count[end] - count[start]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[w] = np.where(counts > 0, sums / scale / counts, np.nan)
+    return out
 
-    daily_kpi = daily_kpi.merge(prev, on=["city_code", "date"], how="left")
 
-    # Variations % (avoiding zero divisions)
-    def _pct(curr, prev):
-        return (curr - prev) / prev.replace({0: pd.NA}) * 100
+def _add_rolling(
+    daily_kpi: pd.DataFrame, windows: Sequence[int] | None = None
+) -> pd.DataFrame:
+    """
+    Rolling means by city for every window in ROLLING_WINDOWS (7d / 14d by default),
+    named avg_max_<w>d / avg_min_<w>d. Expects rows sorted by city_code, date.
+    """
+    windows = sorted(set(windows or ROLLING_WINDOWS))
+    pos = daily_kpi.groupby("city_code", observed=True).cumcount().to_numpy()
+    values = daily_kpi[list(ROLLING_COLUMNS)].to_numpy(dtype="float64")
+    for w, means in _rolling_means(values, pos, windows).items():
+        for j, prefix in enumerate(ROLLING_COLUMNS.values()):
+            daily_kpi[f"{prefix}_{w}d"] = means[:, j]
+    return daily_kpi
 
-    if "temp_min_ly" in daily_kpi.columns:
-        daily_kpi["temp_min_yoy_pct"] = _pct(
-            daily_kpi["temp_min"], daily_kpi["temp_min_ly"]
-        )
-    if "temp_max_ly" in daily_kpi.columns:
-        daily_kpi["temp_max_yoy_pct"] = _pct(
-            daily_kpi["temp_max"], daily_kpi["temp_max_ly"]
+
+def _rolling_output_columns() -> list[str]:
+    return [f"{p}_{w}d" for w in ROLLING_WINDOWS for p in ROLLING_COLUMNS.values()]
+
+
+def _shift_back(days: np.ndarray, horizon: str) -> np.ndarray:
+    """
+    Same day one week / month / year earlier (datetime64[D] in and out).
+    Month and year shifts keep the day of month, clamped to the target month's
+    length: Mar 31 → Feb 28/29, and Feb 29 → Feb 28 of the prior year.
+    """
+    if horizon == "week":
+        return days - np.timedelta64(7, "D")
+    months = 1 if horizon == "month" else 12
+    month_start: np.ndarray = days.astype("datetime64[M]")
+    day_of_month = days - month_start.astype("datetime64[D]")
+    target = month_start - np.timedelta64(months, "M")
+    month_len = (target + np.timedelta64(1, "M")).astype(
+        "datetime64[D]"
+    ) - target.astype("datetime64[D]")
+    return target.astype("datetime64[D]") + np.minimum(
+        day_of_month, month_len - np.timedelta64(1, "D")
+    )
+
+
+def _add_prior_period(
+    daily_kpi: pd.DataFrame,
+    lookup: pd.DataFrame | None = None,
+    horizons: Sequence[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Prior-period values and % changes for every horizon in COMPARE_HORIZONS
+    (year by default: temp_min_ly / temp_max_ly / *_yoy_pct).
+    `lookup` holds the prior values (defaults to daily_kpi itself, one row per
+    city & date). Each row looks up exactly one prior date in a sorted
+    (city, day) key array, so nothing is copied or merged and no row is duplicated.
+    """
+    lookup = daily_kpi if lookup is None else lookup
+    horizons = COMPARE_HORIZONS if horizons is None else horizons
+    unknown = set(horizons) - set(COMPARE_SUFFIXES)
+    if unknown:
+        raise ValueError(
+            f"Unknown comparison horizons {sorted(unknown)} (valid: {list(COMPARE_SUFFIXES)})"
         )
 
-    # --------------------
-    # MONTHLY KPIs (city-month)
-    # --------------------
-    # --- Monthly KPIs (schema fijo para Postgres) ---
-    m = df.copy()
-    m["month"] = pd.to_datetime(m["date"]).dt.to_period("M").astype(str)
+    # (city, day) → one int64 key; cities coded against the lookup's cities,
+    # days as offsets from the lookup's first day
+    lk_city, cities = pd.factorize(lookup["city_code"])
+    lk_days = lookup["date"].to_numpy().astype("datetime64[D]")
+    origin = lk_days.min() if len(lk_days) else np.datetime64("1970-01-01", "D")
+    span = np.int64(1) << 32
+    lk_keys = lk_city.astype("int64") * span + (lk_days - origin).astype("int64")
+    lk_values = lookup[COMPARE_COLUMNS].to_numpy(dtype="float64")
+    if not (np.diff(lk_keys) > 0).all():  # already sorted by city, date in build_gold
+        order = np.argsort(lk_keys, kind="stable")
+        lk_keys, lk_values = lk_keys[order], lk_values[order]
+
+    if lookup is daily_kpi:
+        city_idx, days = lk_city, lk_days
+    else:
+        cities = pd.Index(np.asarray(cities, dtype=object))
+        city_idx = cities.get_indexer(daily_kpi["city_code"].astype(object))
+        days = daily_kpi["date"].to_numpy().astype("datetime64[D]")
+    day_num = (days - origin).astype("int64")
+    first, last = (day_num.min(), day_num.max()) if len(day_num) else (0, -1)
+    # Calendar shifts are computed once per distinct day, then indexed per row
+    calendar = np.arange(first, last + 1) + origin
+    city_base = city_idx.astype("int64") * span
+
+    current = daily_kpi[COMPARE_COLUMNS].to_numpy(dtype="float64")
+    for horizon in horizons:
+        value_sfx, pct_sfx = COMPARE_SUFFIXES[horizon]
+        shifted = (_shift_back(calendar, horizon) - origin).astype("int64")
+        query = city_base + shifted[day_num - first]
+        prev = np.full(current.shape, np.nan)
+        if len(lk_keys):
+            pos = np.minimum(np.searchsorted(lk_keys, query), len(lk_keys) - 1)
+            found = (city_idx >= 0) & (lk_keys[pos] == query)
+            prev[found] = lk_values[pos[found]]
+        for j, col in enumerate(COMPARE_COLUMNS):
+            daily_kpi[f"{col}_{value_sfx}"] = prev[:, j]
+        # Variations % (avoiding zero divisions)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct = np.where(prev == 0, np.nan, (current - prev) / prev * 100)
+        for j, col in enumerate(COMPARE_COLUMNS):
+            daily_kpi[f"{col}_{pct_sfx}"] = pct[:, j]
+    return daily_kpi
+
+
+def _compare_output_columns() -> list[str]:
+    return [
+        f"{col}_{sfx}"
+        for h in COMPARE_HORIZONS
+        for sfx in COMPARE_SUFFIXES[h]
+        for col in COMPARE_COLUMNS
+    ]
 
-    print(m.columns)
-    print(m.head())
 
-    monthly_kpi = (
-        m.groupby(["city_code", "month"], dropna=False)
+def _monthly_kpis(df: pd.DataFrame) -> pd.DataFrame:
+    """MONTHLY KPIs (city-month) from the SILVER rows."""
+    # --- Monthly KPIs (schema fijo para Postgres) ---
+    # Month key as a separate series (yyyymm from _prepare_silver when present):
+    # no copy of the SILVER rows
+    if "yyyymm" in df.columns:
+        month = df["yyyymm"].rename("month")
+    else:
+        month = pd.to_datetime(df["date"]).dt.to_period("M").astype(str).rename("month")
+    logger.debug(f"Monthly input columns: {list(df.columns)}, rows={len(df)}")
+
+    return (
+        df.groupby([df["city_code"], month], dropna=False, observed=True)
         .agg(
             avg_temp_min=("temp_min", "mean"),
             avg_temp_max=("temp_max", "mean"),
@@ -124,6 +281,8 @@ def build_gold(run_date: str | None = None) -> str:
         .sort_values(["city_code", "month"])
     )
 
+
+def _round_metrics(daily_kpi: pd.DataFrame, monthly_kpi: pd.DataFrame) -> None:
     # Round numeric metrics to 1 decimal
     for col in [
         "temp_max",
@@ -131,14 +290,8 @@ def build_gold(run_date: str | None = None) -> str:
         "temp_avg",
         "temp_range",
         "precip_mm",
-        "avg_max_7d",
-        "avg_min_7d",
-        "avg_max_14d",
-        "avg_min_14d",
-        "temp_min_ly",
-        "temp_max_ly",
-        "temp_min_yoy_pct",
-        "temp_max_yoy_pct",
+        *_rolling_output_columns(),
+        *_compare_output_columns(),
     ]:
         if col in daily_kpi.columns:
             daily_kpi[col] = daily_kpi[col].round(1)
@@ -147,28 +300,34 @@ def build_gold(run_date: str | None = None) -> str:
         if col in monthly_kpi.columns:
             monthly_kpi[col] = monthly_kpi[col].round(1)
 
+
+def _prepare_silver(df: pd.DataFrame) -> pd.DataFrame:
+    # Ensure dtypes and helpers
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df = df.dropna(subset=["date"]).copy()
+    df["yyyymm"] = df["date"].dt.to_period("M").astype(str)
+    return df
+
+
+# GOLD files written per run_date
+DAILY_ENRICHED = "weather_daily_enriched.parquet"
+DAILY_KPIS = "weather_daily_kpis.parquet"
+MONTHLY_KPIS = "weather_monthly_kpis.parquet"
+
+
+def gold_outputs(
+    daily_kpi: pd.DataFrame, monthly_kpi: pd.DataFrame, run_date: str
+) -> dict[str, pd.DataFrame]:
+    """GOLD frames exactly as written to disk / loaded to Postgres, keyed by file name."""
     # Harmonize columns before saving.
     # 1) add run_date columns (explicit, besides folder partition)
-    _run_date = run_date or datetime.date.today().isoformat()
-    daily_kpi["run_date"] = _run_date
-    monthly_kpi["run_date"] = _run_date
+    daily_kpi["run_date"] = run_date
+    monthly_kpi["run_date"] = run_date
 
     # 2) ensure date types are pure dates (no time)
     daily_kpi["date"] = pd.to_datetime(daily_kpi["date"]).dt.date
 
     # With this, gold stays aligned with the subsequent Postgres schema.
-
-    # Saving GOLD
-    run_date = run_date or datetime.date.today().isoformat()
-    out_dir = os.path.join(DATA_DIR, "gold", run_date)
-    os.makedirs(out_dir, exist_ok=True)
-
-    daily_parquet = os.path.join(out_dir, "weather_daily_kpis.parquet")
-    monthly_parquet = os.path.join(out_dir, "weather_monthly_kpis.parquet")
-    daily_enriched_parquet = os.path.join(out_dir, "weather_daily_enriched.parquet")
-
-    logger.info(f"Saving GOLD outputs for run_date={run_date}")
-    daily_kpi.to_parquet(daily_enriched_parquet, index=False)
     daily_kpis_out = daily_kpi.rename(
         columns={
             "temp_min": "avg_temp_min",
@@ -176,8 +335,7 @@ def build_gold(run_date: str | None = None) -> str:
             "precip_mm": "avg_precip_mm",
         }
     )[["city_code", "avg_temp_min", "avg_temp_max", "avg_precip_mm"]]
-    daily_kpis_out["run_date"] = _run_date
-    daily_kpis_out.to_parquet(daily_parquet, index=False)
+    daily_kpis_out["run_date"] = run_date
     monthly_kpi = monthly_kpi[
         [
             "city_code",
@@ -188,22 +346,682 @@ def build_gold(run_date: str | None = None) -> str:
             "total_precip",
         ]
     ]
-    monthly_kpi["run_date"] = _run_date
-    monthly_kpi.to_parquet(monthly_parquet, index=False)
+    monthly_kpi["run_date"] = run_date
+    return {
+        DAILY_ENRICHED: daily_kpi,
+        DAILY_KPIS: daily_kpis_out,
+        MONTHLY_KPIS: monthly_kpi,
+    }
 
+
+SAMPLE_ROWS = 200
+
+
+def write_gold_outputs(outputs: dict[str, pd.DataFrame], run_date: str) -> str:
+    # Saving GOLD
+    out_dir = os.path.join(DATA_DIR, "gold", run_date)
+    os.makedirs(out_dir, exist_ok=True)
+
+    logger.info(f"Saving GOLD outputs for run_date={run_date}")
+    for name, frame in outputs.items():
+        write_compact(frame, os.path.join(out_dir, name))
+
+    _write_samples(outputs, out_dir)
+
+    paths = [os.path.join(out_dir, name) for name in outputs]
+    logger.info(f"GOLD saved: {', '.join(paths)}")
+    return out_dir
+
+
+def _write_samples(outputs: dict[str, pd.DataFrame], out_dir: str) -> None:
     # CSV samples
-    daily_kpi.head(200).to_csv(
+    outputs[DAILY_ENRICHED].head(SAMPLE_ROWS).to_csv(
         os.path.join(out_dir, "weather_daily_enriched_sample.csv"), index=False
     )
-    monthly_kpi.head(200).to_csv(
+    outputs[MONTHLY_KPIS].head(SAMPLE_ROWS).to_csv(
         os.path.join(out_dir, "weather_monthly_kpis_sample.csv"), index=False
     )
 
-    print(
-        f"✅ GOLD saved:\n  {daily_parquet}\n  {daily_enriched_parquet}\n  {monthly_parquet}"
+
+def _write_gold(
+    daily_kpi: pd.DataFrame, monthly_kpi: pd.DataFrame, run_date: str
+) -> str:
+    return write_gold_outputs(gold_outputs(daily_kpi, monthly_kpi, run_date), run_date)
+
+
+def gold_from_silver(
+    df: pd.DataFrame,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Full GOLD computation from SILVER rows (BASE_COLUMNS) held in memory.
+    Returns (base, daily_kpi, monthly_kpi), rounded like the files on disk.
+    """
+    # Ensure dtypes and helpers
+    df = _prepare_silver(df)
+
+    # DAILY KPIs + rolling + YoY, MONTHLY KPIs
+    with track("gold.daily_base", rows_in=len(df)) as rec:
+        base = _daily_base(df)
+        rec["rows_out"] = len(base)
+    with track("gold.rolling", rows_in=len(base), windows=ROLLING_WINDOWS):
+        daily_kpi = _add_rolling(base.copy())
+    with track("gold.prior_period", rows_in=len(daily_kpi)) as rec:
+        daily_kpi = _add_prior_period(daily_kpi)
+        rec["rows_out"] = len(daily_kpi)
+    with track("gold.monthly", rows_in=len(df)) as rec:
+        monthly_kpi = _monthly_kpis(df)
+        rec["rows_out"] = len(monthly_kpi)
+    _round_metrics(daily_kpi, monthly_kpi)
+    return base[BASE_COLUMNS], daily_kpi, monthly_kpi
+
+
+# --------------------
+# Sharded build
+# --------------------
+# Every GOLD computation is per city (rolling windows and prior-period lookups
+# never cross cities, daily/monthly KPIs group by city), so cities can be split
+# into shards computed independently and concatenated.
+
+
+def city_shard(city_code: str, shards: int) -> int:
+    # crc32, not hash(): str hashes are salted per process
+    return zlib.crc32(city_code.encode("utf-8")) % shards
+
+
+def _gold_shard(
+    base_dir: str, source: str, cities: list[str]
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    # Runs in a worker process: reads only its cities (filter pushed to the scan)
+    df = read_silver(
+        base_dir,
+        columns=BASE_COLUMNS,
+        cities=cities,
+        dataset=silver_dataset(base_dir, source),
     )
+    return gold_from_silver(df)
+
+
+def gold_sharded(
+    dataset: ds.Dataset,
+    compacted: bool,
+    workers: int,
+    shards: int | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Full GOLD computation with cities hash-partitioned into `shards` (default:
+    `workers`) computed in a process pool. Returns (base, daily_kpi, monthly_kpi)
+    identical to gold_from_silver over all SILVER rows.
+    """
+    shards = shards or workers
+    codes = read_silver(DATA_DIR, columns=["city_code"], dataset=dataset)["city_code"]
+    categories = list(codes.cat.categories)
+    groups: dict[int, list[str]] = {}
+    for code in categories:
+        groups.setdefault(city_shard(code, shards), []).append(code)
+    logger.info(
+        f"Sharded GOLD: {len(categories)} cities in {len(groups)} shards, "
+        f"{workers} workers"
+    )
+
+    source = "compacted" if compacted else "partitions"
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(groups)))) as pool:
+        parts = list(
+            pool.map(
+                _gold_shard,
+                [DATA_DIR] * len(groups),
+                [source] * len(groups),
+                [groups[k] for k in sorted(groups)],
+            )
+        )
+
+    def _combine(frames: list[pd.DataFrame], keys: list[str]) -> pd.DataFrame:
+        out = pd.concat(frames, ignore_index=True)
+        out["city_code"] = pd.Categorical(out["city_code"], categories=categories)
+        return out.sort_values(keys, kind="stable", ignore_index=True)
+
+    base, daily_kpi, monthly_kpi = (
+        _combine([part[i] for part in parts], keys)
+        for i, keys in enumerate(
+            [["city_code", "date"], ["city_code", "date"], ["city_code", "month"]]
+        )
+    )
+    return base, daily_kpi, monthly_kpi
+
+
+# --------------------
+# Streaming build
+# --------------------
+# Same per-city independence as the sharded build, but sequential: cities go
+# through gold_from_silver in batches sized to a memory budget and each output
+# file grows by one row group per batch. A city with more SILVER rows than the
+# budget is split into runs of whole months (monthly KPIs stay exact), computed
+# in date order with the daily base rows its windows and lookups reach back to.
+
+# Prior-period lookups reach at most one year back (366 days across a Feb 29):
+# daily base rows a month chunk carries over to the next, with MAX_WINDOW - 1
+# rows of rolling context
+PRIOR_PERIOD_DAYS = 366
+
+
+def city_row_counts(dataset: ds.Dataset) -> pd.Series:
+    """SILVER rows per city, counted one record batch at a time."""
+    counts: dict[str, int] = {}
+    batches = dataset.to_batches(
+        columns=["city_code"], fragment_readahead=1, batch_readahead=1
+    )
+    for batch in batches:
+        for code, n in batch.column(0).to_pandas().value_counts().items():
+            counts[code] = counts.get(code, 0) + int(n)
+    return pd.Series(counts, dtype="int64").sort_index()
+
+
+def city_month_counts(dataset: ds.Dataset, city: str) -> pd.Series:
+    """SILVER rows of one city per month (YYYY-MM), one record batch at a time."""
+    counts: dict[str, int] = {}
+    batches = dataset.to_batches(
+        columns=["date"],
+        filter=ds.field("city_code").isin([city]),
+        fragment_readahead=1,
+        batch_readahead=1,
+    )
+    for batch in batches:
+        months = batch.column(0).to_numpy(zero_copy_only=False).astype("M8[M]")
+        keys, n = np.unique(months[~np.isnat(months)], return_counts=True)
+        for month, k in zip(keys, n):
+            counts[str(month)] = counts.get(str(month), 0) + int(k)
+    return pd.Series(counts, dtype="int64").sort_index()
+
+
+def plan_city_batches(counts: pd.Series, max_rows: int) -> list[list[str]]:
+    """
+    Group cities (or the months of one city), in index order, into batches of at
+    most max_rows SILVER rows. A key with more rows than that gets a batch of
+    its own.
+    """
+    batches: list[list[str]] = []
+    current: list[str] = []
+    rows = 0
+    for code, n in counts.items():
+        if current and rows + n > max_rows:
+            batches.append(current)
+            current, rows = [], 0
+        current.append(str(code))
+        rows += int(n)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _gold_chunk(
+    df: pd.DataFrame, context: pd.DataFrame | None
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    gold_from_silver for whole months of one city, after the daily base rows of
+    its earlier months in `context` (None for the first chunk). Returns (base,
+    daily_kpi, monthly_kpi) of these months and the context of the next chunk.
+    """
+    df = _prepare_silver(df)
+    # Same categories in every chunk, so the context concatenates as a category
+    df["city_code"] = df["city_code"].cat.remove_unused_categories()
+    base = _daily_base(df)[BASE_COLUMNS]
+    history = base if context is None else pd.concat([context, base])
+    history = history.reset_index(drop=True)
+    rolled = _add_rolling(history.copy()).tail(len(base)).reset_index(drop=True)
+    daily_kpi = _add_prior_period(rolled, lookup=history)
+    monthly_kpi = _monthly_kpis(df)
+    _round_metrics(daily_kpi, monthly_kpi)
+
+    if len(history):
+        cutoff = history["date"].max() - pd.Timedelta(days=PRIOR_PERIOD_DAYS)
+        tail = np.arange(len(history)) >= len(history) - (MAX_WINDOW - 1)
+        history = history[(history["date"] >= cutoff).to_numpy() | tail]
+    return base, daily_kpi, monthly_kpi, history
+
+
+def gold_streaming(
+    dataset: ds.Dataset, run_date: str, memory_mb: int
+) -> tuple[str, int, int]:
+    """
+    Full GOLD build in city batches bounded by memory_mb: every batch is read
+    (city filter pushed to the scan), computed with gold_from_silver and
+    appended to the GOLD files and to the incremental state's daily base.
+    A city above the budget is read and computed in runs of whole months
+    (see _gold_chunk); a single month above it is logged as a warning.
+    Returns (out_dir, SILVER rows read, daily rows written). The files hold the
+    same rows, in the same order, as a single-process build.
+    """
+    counts = city_row_counts(dataset)
+    max_rows = max(1, memory_mb * 2**20 // GOLD_BYTES_PER_ROW)
+    batches = plan_city_batches(counts, max_rows)
+    logger.info(
+        f"Streaming GOLD: {len(counts)} cities, {int(counts.sum())} SILVER rows "
+        f"in {len(batches)} batches of <= {max_rows} rows ({memory_mb} MB budget)"
+    )
+
+    out_dir = os.path.join(DATA_DIR, "gold", run_date)
+    os.makedirs(out_dir, exist_ok=True)
+    os.makedirs(_state_dir(), exist_ok=True)
+    names = [DAILY_ENRICHED, DAILY_KPIS, MONTHLY_KPIS]
+    writers = {name: ParquetAppender(os.path.join(out_dir, name)) for name in names}
+    # Unrounded: kept in float64, not the compact GOLD schema
+    base_writer = ParquetAppender(
+        os.path.join(_state_dir(), "daily_base.parquet"), compact=False
+    )
+    samples: dict[str, pd.DataFrame] = {}
+
+    def _append(
+        base: pd.DataFrame, daily_kpi: pd.DataFrame, monthly_kpi: pd.DataFrame
+    ) -> None:
+        outputs = gold_outputs(daily_kpi, monthly_kpi, run_date)
+        for name in names:
+            writers[name].write(outputs[name])
+            # Samples: the first rows of the files, as write_gold_outputs
+            kept = samples.get(name)
+            if kept is None or len(kept) < SAMPLE_ROWS:
+                samples[name] = pd.concat([kept, outputs[name].head(SAMPLE_ROWS)]).head(
+                    SAMPLE_ROWS
+                )
+        base_writer.write(base)
+
+    rows_in = 0
+    try:
+        for i, cities in enumerate(batches):
+            if len(cities) == 1 and counts[cities[0]] > max_rows:
+                rows_in += _stream_city(dataset, cities[0], max_rows, i, _append)
+                continue
+            with track("gold.batch", batch=i, cities=len(cities)) as step:
+                df = read_silver(
+                    DATA_DIR,
+                    columns=BASE_COLUMNS,
+                    cities=cities,
+                    dataset=dataset,
+                    low_memory=True,
+                )
+                step["rows_in"] = len(df)
+                rows_in += len(df)
+                base, daily_kpi, monthly_kpi = gold_from_silver(df)
+                del df
+                _append(base, daily_kpi, monthly_kpi)
+                step["rows_out"] = len(daily_kpi)
+    except BaseException:
+        for writer in [*writers.values(), base_writer]:
+            writer.abort()
+        raise
+    for writer in [*writers.values(), base_writer]:
+        writer.close()
+
+    if samples:
+        _write_samples(samples, out_dir)
+    logger.info(f"GOLD saved (streamed): {', '.join(w.path for w in writers.values())}")
+    return out_dir, rows_in, writers[DAILY_ENRICHED].rows
+
+
+def _stream_city(
+    dataset: ds.Dataset,
+    city: str,
+    max_rows: int,
+    batch: int,
+    append: Callable[[pd.DataFrame, pd.DataFrame, pd.DataFrame], None],
+) -> int:
+    """One city above the budget, in month chunks of <= max_rows SILVER rows."""
+    months = city_month_counts(dataset, city)
+    chunks = plan_city_batches(months, max_rows)
+    logger.info(
+        f"Streaming GOLD: {city} has {int(months.sum())} SILVER rows, "
+        f"split into {len(chunks)} chunks of whole months"
+    )
+    rows_in = 0
+    context = None
+    for chunk in chunks:
+        rows = int(months[chunk].sum())
+        if rows > max_rows:
+            logger.warning(
+                f"Streaming GOLD: {city} has {rows} SILVER rows in {chunk[0]}, "
+                f"above the {max_rows} rows of the memory budget"
+            )
+        with track("gold.batch", batch=batch, cities=1, months=len(chunk)) as step:
+            df = read_silver(
+                DATA_DIR,
+                columns=BASE_COLUMNS,
+                start=pd.Period(chunk[0], "M").start_time,
+                end=pd.Period(chunk[-1], "M").end_time,
+                cities=[city],
+                dataset=dataset,
+                low_memory=True,
+            )
+            step["rows_in"] = len(df)
+            rows_in += len(df)
+            base, daily_kpi, monthly_kpi, context = _gold_chunk(df, context)
+            del df
+            append(base, daily_kpi, monthly_kpi)
+            step["rows_out"] = len(daily_kpi)
+    return rows_in
+
+
+# --------------------
+# Incremental state
+# --------------------
+# gold/_state/state.json       → SILVER files (path → mtime) and gold dir of the last build:
+#                                the files GOLD reads, i.e. the month files of the
+#                                compacted store or the CLEAN partitions
+# gold/_state/daily_base.parquet → unrounded daily aggregates of the last build
+
+
+def _state_dir() -> str:
+    return os.path.join(DATA_DIR, "gold", "_state")
+
+
+def _load_state() -> dict | None:
+    path = os.path.join(_state_dir(), "state.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _gold_config() -> dict:
+    # Output columns depend on these: a change forces a full rebuild
+    return {"windows": ROLLING_WINDOWS, "horizons": COMPARE_HORIZONS}
+
+
+def _save_state(
+    paths: list[str], base: pd.DataFrame | None, out_dir: str, compacted: bool
+) -> None:
+    # base=None: daily_base.parquet was already written (streaming build)
+    os.makedirs(_state_dir(), exist_ok=True)
+    if base is not None:
+        # Unrounded: kept in float64, not the compact GOLD schema
+        base.to_parquet(os.path.join(_state_dir(), "daily_base.parquet"), index=False)
+    state = {
+        "gold_dir": out_dir,
+        "compacted": compacted,
+        "config": _gold_config(),
+        "silver": {p: os.path.getmtime(p) for p in paths},
+    }
+    path = os.path.join(_state_dir(), "state.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _build_incremental(
+    dataset: ds.Dataset, changed: list[str], state: dict
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Recompute only what the changed SILVER files (CLEAN partitions or month files
+    of the compacted store) touch and merge it into the previous GOLD outputs.
+    Returns (base, daily_kpi, monthly_kpi) like a full build.
+    """
+    gold_dir = state["gold_dir"]
+    prev_daily = read_compact(os.path.join(gold_dir, DAILY_ENRICHED)).drop(
+        columns=["run_date"]
+    )
+    prev_daily["city_code"] = prev_daily["city_code"].astype(str)
+    prev_monthly = read_compact(os.path.join(gold_dir, MONTHLY_KPIS)).drop(
+        columns=["run_date"]
+    )
+    prev_monthly["city_code"] = prev_monthly["city_code"].astype(str)
+    base = pd.read_parquet(os.path.join(_state_dir(), "daily_base.parquet"))
+    base["city_code"] = base["city_code"].astype(str)
+
+    if not changed:
+        return base, prev_daily, prev_monthly
+
+    # 1) Keys (city_code, date) carried by the changed files. A rewritten month
+    #    file does not say which of its rows changed: all its keys are redone
+    if state["compacted"]:
+        new_rows = read_silver(
+            DATA_DIR,
+            columns=["city_code", "date"],
+            dataset=ds.dataset(changed, format="parquet", schema=SILVER_SCHEMA),
+        )
+    else:
+        changed_runs = [os.path.basename(os.path.dirname(p)) for p in changed]
+        new_rows = read_silver(
+            DATA_DIR,
+            columns=["city_code", "date"],
+            run_dates=changed_runs,
+            dataset=dataset,
+        )
+    new_rows = _prepare_silver(new_rows)
+    new_rows["city_code"] = new_rows["city_code"].astype(str)
+    if new_rows.empty:
+        return base, prev_daily, prev_monthly
+    cities = sorted(new_rows["city_code"].unique())
+
+    # 2) All SILVER rows of the touched months (any partition) for those cities:
+    #    enough to recompute the daily aggregates and the monthly KPIs exactly
+    lo = new_rows["date"].min().to_period("M").start_time
+    hi = new_rows["date"].max().to_period("M").end_time
+    touched = _prepare_silver(
+        read_silver(
+            DATA_DIR,
+            columns=BASE_COLUMNS,
+            start=lo,
+            end=hi,
+            cities=cities,
+            dataset=dataset,
+        )
+    )
+    touched["city_code"] = touched["city_code"].astype(str)
+    months = new_rows[["city_code", "yyyymm"]].drop_duplicates()
+    touched = touched.merge(months, on=["city_code", "yyyymm"], how="inner")
+
+    # 3) Daily base: replace the recomputed keys
+    fresh = _daily_base(touched)
+    keys = ["city_code", "date"]
+    base = pd.concat(
+        [anti_join(base, fresh, keys), fresh], ignore_index=True
+    ).sort_values(keys, kind="stable", ignore_index=True)
+
+    # 4) Rolling: for each touched city, every row from its first recomputed date
+    #    to the end, computed with MAX_WINDOW - 1 rows of trailing context
+    base["_pos"] = base.groupby("city_code").cumcount()
+    first_date = fresh.groupby("city_code")["date"].min().rename("_first")
+    start = (
+        base.merge(first_date, left_on="city_code", right_index=True)
+        .query("date >= _first")
+        .groupby("city_code")["_pos"]
+        .min()
+        .rename("_start")
+    )
+    ctx = base.merge(start, left_on="city_code", right_index=True)
+    ctx = ctx[ctx["_pos"] >= ctx["_start"] - (MAX_WINDOW - 1)]
+    rolled = _add_rolling(ctx.drop(columns=["_pos", "_start"]).copy())
+    rolled = rolled[(ctx["_pos"] >= ctx["_start"]).to_numpy()]
+    base = base.drop(columns=["_pos"])
+
+    # 5) Prior-period values for the same rows (this includes every row one
+    #    week / month / year after a recomputed date), looked up in the full base
+    redo = _add_prior_period(rolled, lookup=base)
+
+    daily_kpi = pd.concat(
+        [anti_join(prev_daily, redo, keys), redo], ignore_index=True
+    ).sort_values(keys, kind="stable", ignore_index=True)
+
+    # 6) Monthly: only the touched months
+    monthly_kpi = pd.concat(
+        [
+            anti_join(
+                prev_monthly,
+                months.rename(columns={"yyyymm": "month"}),
+                ["city_code", "month"],
+            ),
+            _monthly_kpis(touched),
+        ],
+        ignore_index=True,
+    ).sort_values(["city_code", "month"], kind="stable", ignore_index=True)
+
+    logger.info(
+        f"Incremental GOLD: {len(changed)} changed files, {len(cities)} cities, "
+        f"{len(fresh)} daily keys recomputed, {len(redo)} enriched rows refreshed, "
+        f"{len(months)} months refreshed"
+    )
+    return base, daily_kpi[prev_daily.columns], monthly_kpi
+
+
+def build_gold(
+    run_date: str | None = None,
+    incremental: bool = False,
+    workers: int | None = None,
+    memory_mb: int | None = None,
+) -> str:
+    logger.info("Starting gold_weather()")
+    """
+    Brief explanation of the GOLD layer builder:
+      - Reads all SILVER (clean) partitions (data/clean/*/weather.parquet) as one
+        pyarrow dataset, pruned to the needed columns
+      - Builds daily KPIs (with 7d/14d rolling) and prior-period deltas
+        (YoY same-day by default, see GOLD_COMPARE_HORIZONS)
+      - Builds monthly aggregates
+      - Saves GOLD outputs partitioned by run_date
+      - incremental=True: only recomputes the cities/dates touched by SILVER
+        partitions added or rewritten since the last build (falls back to a
+        full build when there is no previous state or a partition was removed)
+      - workers > 1 (GOLD_WORKERS): full builds are sharded by city across
+        worker processes (see gold_sharded), same output
+      - memory_mb > 0 (GOLD_MEMORY_MB): full builds stream city batches that fit
+        the budget and append the outputs batch by batch (see gold_streaming)
+      - Records timings / rows per step in data/metrics/<run_date>/gold.json
+    """
+    run_date = run_date or datetime.date.today().isoformat()
+    workers = workers or GOLD_WORKERS
+    memory_mb = GOLD_MEMORY_MB if memory_mb is None else memory_mb
+    with track(
+        "gold", incremental=incremental, workers=workers, memory_mb=memory_mb
+    ) as rec:
+        out_dir = _build_gold(run_date, incremental, rec, workers, memory_mb)
+    write_metrics(DATA_DIR, run_date, "gold")
+    return out_dir
+
+
+def _build_gold(
+    run_date: str,
+    incremental: bool,
+    rec: dict,
+    workers: int = 1,
+    memory_mb: int = 0,
+) -> str:
+    # 1) SILVER as one dataset: compacted store if present, else all CLEAN partitions
+    clean_paths = silver_paths(DATA_DIR)
+    if not clean_paths:
+        logger.warning("No clean (silver) files found.")
+        return ""
+    dataset = silver_dataset(DATA_DIR)
+
+    # Basic validations
+    missing = missing_columns(dataset, SILVER_COLUMNS)
+    if missing:
+        logger.error(f"Missing required columns for GOLD: {missing}")
+        return ""
+
+    # Incremental state tracks the files GOLD reads: with the compacted store,
+    # CLEAN partitions count once compact_silver has merged them into month files
+    compacted = use_compacted(DATA_DIR)
+    paths = store_paths(DATA_DIR) if compacted else clean_paths
+
+    state = _load_state() if incremental else None
+    if state is not None:
+        known = state["silver"]
+        changed = [p for p in paths if known.get(p) != os.path.getmtime(p)]
+        if (
+            set(known) - set(paths)
+            or not os.path.isdir(state["gold_dir"])
+            or state.get("compacted") != compacted
+            or state.get("config") != _gold_config()
+        ):
+            logger.info(
+                "SILVER files removed, source or GOLD config changed, "
+                "or GOLD missing: full rebuild"
+            )
+            state = None
+
+    if state is not None:
+        logger.info(f"Incremental GOLD build, changed SILVER files: {changed}")
+        with track("gold.incremental", changed=len(changed)) as step:
+            base, daily_kpi, monthly_kpi = _build_incremental(dataset, changed, state)
+            step["rows_out"] = len(daily_kpi)
+        _round_metrics(daily_kpi, monthly_kpi)
+    elif memory_mb > 0:
+        with track("gold.streaming", memory_mb=memory_mb) as step:
+            out_dir, rows_in, rows_out = gold_streaming(dataset, run_date, memory_mb)
+            step.update(rows_in=rows_in, rows_out=rows_out)
+        bytes_written = file_bytes(
+            *(
+                os.path.join(out_dir, n)
+                for n in (DAILY_ENRICHED, DAILY_KPIS, MONTHLY_KPIS)
+            )
+        )
+        rec.update(rows_in=rows_in, rows_out=rows_out, bytes_written=bytes_written)
+        _save_state(paths, None, out_dir, compacted)
+        return out_dir
+    elif workers > 1:
+        with track("gold.sharded", workers=workers) as step:
+            base, daily_kpi, monthly_kpi = gold_sharded(
+                dataset, compacted, workers, GOLD_SHARDS
+            )
+            step["rows_out"] = len(daily_kpi)
+    else:
+        # Only the columns GOLD uses, in one scan (no per-file frames + concat)
+        with track("gold.read_silver") as step:
+            df = read_silver(DATA_DIR, columns=BASE_COLUMNS, dataset=dataset)
+            step.update(
+                rows_out=len(df),
+                bytes_read=file_bytes(*(f.path for f in dataset.get_fragments())),
+            )
+        logger.info(f"SILVER combined shape: {df.shape}")
+        rec["rows_in"] = len(df)
+        base, daily_kpi, monthly_kpi = gold_from_silver(df)
+
+    with track("gold.write", rows_in=len(daily_kpi)) as step:
+        out_dir = _write_gold(daily_kpi, monthly_kpi, run_date)
+        step["bytes_written"] = file_bytes(
+            *(
+                os.path.join(out_dir, n)
+                for n in (DAILY_ENRICHED, DAILY_KPIS, MONTHLY_KPIS)
+            )
+        )
+    rec.update(rows_out=len(daily_kpi), bytes_written=step["bytes_written"])
+    _save_state(paths, base, out_dir, compacted)
     return out_dir
 
 
 if __name__ == "__main__":
-    build_gold()
+    parser = argparse.ArgumentParser(description="Build GOLD outputs")
+    parser.add_argument("--run-date", help="GOLD partition (default: today)")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=os.getenv("GOLD_INCREMENTAL", "0") == "1",
+        help="Only recompute cities/dates touched since the last GOLD build",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=GOLD_WORKERS,
+        help="Processes for a full build (cities are sharded across them)",
+    )
+    parser.add_argument(
+        "--memory-mb",
+        type=int,
+        default=GOLD_MEMORY_MB,
+        help="Full builds: stream city batches within this memory budget (0: off)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["pandas", "sql"],
+        default=os.getenv("GOLD_ENGINE", "pandas"),
+        help="sql: compute GOLD inside Postgres from weather.weather_silver",
+    )
+    args = parser.parse_args()
+    if args.engine == "sql":
+        from models.gold_sql import build_gold_sql
+
+        build_gold_sql(args.run_date)
+    else:
+        build_gold(
+            args.run_date,
+            incremental=args.incremental,
+            workers=args.workers,
+            memory_mb=args.memory_mb,
+        )
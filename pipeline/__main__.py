@@ -0,0 +1,50 @@
+"""
+Single entry point for the pipeline stages:
+
+    python -m pipeline <stage> [stage options]
+    python -m pipeline gold --incremental
+    python -m pipeline run --stages clean,gold
+
+Each stage runs its module's own CLI (python -m pipeline gold --help lists the
+options of python -m models.gold_weather). Only that module is imported, after
+the arguments are parsed: `python -m pipeline --help` or a typo in the stage
+costs no pandas / pyarrow / SQLAlchemy / requests import, and a stage imports
+what it uses (fetch never imports pandas, only load creates a DB engine).
+"""
+
+import argparse
+import runpy
+import sys
+from typing import Sequence
+
+# Stage → module run as __main__ (same CLI as python -m <module>)
+STAGE_MODULES = {
+    "fetch": "ingestion.fetch_weather",
+    "clean": "transformations.clean_weather",
+    "validate": "transformations.validate_weather",
+    "compact": "transformations.compact_silver",
+    "gold": "models.gold_weather",
+    "gold-sql": "models.gold_sql",
+    "load": "loaders.load_to_pg",
+    "run": "pipeline.runner",
+}
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m pipeline",
+        description="Run one pipeline stage",
+        epilog="Stage options: python -m pipeline <stage> --help",
+    )
+    parser.add_argument("stage", choices=list(STAGE_MODULES))
+    parser.add_argument(
+        "args", nargs=argparse.REMAINDER, help="Options passed to the stage"
+    )
+    args = parser.parse_args(argv)
+
+    sys.argv = [sys.argv[0], *args.args]
+    runpy.run_module(STAGE_MODULES[args.stage], run_name="__main__", alter_sys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Stage / sub-step measurements collected in this process, flushed per stage
+# to data/metrics/<run_date>/<stage>.json by write_metrics()
+_records: list[dict[str, Any]] = []
+_lock = threading.Lock()
+
+
+def _rss_mb() -> float | None:
+    """Current resident set size (Linux /proc only)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+
+
+def _peak_rss_mb() -> float | None:
+    """Process high-water mark RSS so far (ru_maxrss: KiB on Linux)."""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def file_bytes(*paths: str) -> int:
+    """Total size of the existing files among `paths`."""
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+
+@contextmanager
+def track(name: str, **fields: Any) -> Iterator[dict[str, Any]]:
+    """
+    Measure one stage or sub-step (dotted name: "gold", "gold.rolling", ...).
+    Yields the record, so the body can add rows_in / rows_out / bytes_read /
+    bytes_written or any tag (table, path). On exit it gets:
+    - wall_s: elapsed time
+    - cpu_s: process CPU time (all threads of this process, not child processes)
+    - rss_mb / peak_rss_mb: resident memory at the end and process peak so far
+    Records are kept even when the body raises (with error set).
+    """
+    rec: dict[str, Any] = {
+        "name": name,
+        "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        **fields,
+    }
+    t0, c0 = time.perf_counter(), time.process_time()
+    try:
+        yield rec
+    except BaseException as e:
+        rec["error"] = repr(e)
+        raise
+    finally:
+        rec["wall_s"] = round(time.perf_counter() - t0, 4)
+        rec["cpu_s"] = round(time.process_time() - c0, 4)
+        rec["rss_mb"] = _rss_mb()
+        rec["peak_rss_mb"] = _peak_rss_mb()
+        with _lock:
+            _records.append(rec)
+        logger.debug(f"metrics {rec}")
+
+
+def records(stage: str | None = None) -> list[dict[str, Any]]:
+    """Records collected so far (only `stage` and its sub-steps when given)."""
+    with _lock:
+        return [
+            r
+            for r in _records
+            if stage is None or r["name"] == stage or r["name"].startswith(stage + ".")
+        ]
+
+
+def write_metrics(base_dir: str, run_date: str, stage: str) -> str:
+    """
+    Flush the records of `stage` to data/metrics/<run_date>/<stage>.json
+    (replacing the file of a previous run of the same stage) and log a summary.
+    """
+    recs = records(stage)
+    with _lock:
+        for r in recs:
+            _records.remove(r)
+
+    out_dir = os.path.join(base_dir, "metrics", run_date)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{stage}.json")
+    doc = {"run_date": run_date, "stage": stage, "pid": os.getpid(), "records": recs}
+    with open(path + ".tmp", "w") as f:
+        json.dump(doc, f, indent=2, default=str)
+    os.replace(path + ".tmp", path)
+
+    for r in recs:
+        rows = r.get("rows_out", r.get("rows_in", "-"))
+        name = f"{r['name']}[{r['table']}]" if r.get("table") else r["name"]
+        logger.info(
+            f"[metrics] {name:<32} wall={r['wall_s']:.3f}s cpu={r['cpu_s']:.3f}s "
+            f"rows={rows} peak_rss={r['peak_rss_mb'] or 0:.0f}MB"
+        )
+    return path
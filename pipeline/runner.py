@@ -0,0 +1,248 @@
+import argparse
+import datetime
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Sequence
+
+import pandas as pd
+
+from ingestion.raw_store import iter_city_blobs, raw_path
+from models import gold_weather as gw
+from pipeline.metrics import track, write_metrics
+from transformations import clean_weather as cw
+from transformations import validate_weather as vw
+from transformations.compact_silver import compact_silver
+from transformations.silver_store import (
+    anti_join,
+    read_silver,
+    silver_paths,
+    use_compacted,
+)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Pipeline order (a run executes the requested subset in this order)
+STAGES = ("fetch", "clean", "validate", "compact", "gold", "load")
+# Threads writing RAW / CLEAN / GOLD files in the background
+PERSIST_WORKERS = int(os.getenv("PERSIST_WORKERS", "2"))
+
+
+def _silver_with_today(clean: pd.DataFrame, run_date: str) -> pd.DataFrame:
+    """
+    SILVER rows as build_gold would read them once today's CLEAN partition is on
+    disk: history from disk (run_date excluded) + today's rows from memory.
+    With the compacted store, today's rows replace the stored ones (last run wins).
+    """
+    runs = [os.path.basename(os.path.dirname(p)) for p in silver_paths(gw.DATA_DIR)]
+    others = [rd for rd in runs if rd != run_date]
+    today = clean[gw.BASE_COLUMNS].copy()
+    today["city_code"] = today["city_code"].astype(str)
+    if not others:
+        df = today
+    else:
+        history = read_silver(gw.DATA_DIR, columns=gw.BASE_COLUMNS, run_dates=others)
+        history["city_code"] = history["city_code"].astype(str)
+        if use_compacted(gw.DATA_DIR):
+            history = anti_join(history, today, ["city_code", "date"])
+        df = pd.concat([history, today], ignore_index=True)
+    df["city_code"] = pd.Categorical(
+        df["city_code"], categories=sorted(df["city_code"].unique())
+    )
+    return df
+
+
+def _load(outputs: dict[str, Any]) -> dict[str, int]:
+    """
+    Load every table: frames produced in this run go straight from memory,
+    the others from their files (through the load manifest).
+    """
+    # Imported here: SQLAlchemy / the DB driver only for runs that load
+    from loaders import load_to_pg as lp
+
+    frames: dict[str, pd.DataFrame] = dict(outputs.get("gold", {}))
+    if "clean" in outputs:
+        frames["weather.parquet"] = outputs["clean"]
+    rows: dict[str, int] = {}
+    from_disk = []
+    for spec in lp.table_specs(use_compacted(lp.DATA_DIR)):
+        frame = frames.get(os.path.basename(spec["parquet_glob"]))
+        if frame is None:
+            from_disk.append(spec)
+            continue
+        rows[spec["table_name"]] = lp.load_frame(
+            frame,
+            spec["table_name"],
+            spec["columns"],
+            spec["conflict_keys"],
+            spec.get("do_update", False),
+        )
+    if from_disk:
+        report = lp.load_tables(from_disk)
+        rows.update({name: r["rows"] for name, r in report.items()})
+    return rows
+
+
+def run_pipeline(
+    run_date: str | None = None,
+    stages: Sequence[str] = STAGES,
+    persist: bool = True,
+    full_refresh: bool = False,
+) -> dict[str, Any]:
+    """
+    Run pipeline stages in one process, handing each stage's output to the next
+    in memory (payloads → CLEAN frame → GOLD frames → Postgres).
+    - stages: subset of STAGES. A stage whose upstream did not run in this call
+      reads the persisted layer instead (RAW, SILVER, GOLD files).
+    - persist=True: RAW, CLEAN and GOLD files are still written (same files as the
+      per-script entry points) on background threads while the next stages run;
+      the call waits for them before returning. persist=False keeps everything in
+      memory (fetch watermarks do not move, nothing is written but Postgres).
+    - validate after clean filters the CLEAN frame in memory; the partition is
+      then persisted with the valid rows only, plus its quarantine file.
+    - The incremental GOLD state (gold/_state) is not updated by this runner.
+    Returns the in-memory outputs: raw (payloads), clean (frame), gold (frames by
+    file name), load (rows per table).
+    """
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {sorted(unknown)} (valid: {STAGES})")
+    run_date = run_date or datetime.date.today().isoformat()
+    base_dir = os.getenv("DATA_DIR", "./data")
+    outputs: dict[str, Any] = {}
+    pending: list[Future] = []
+    t_run = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, PERSIST_WORKERS)) as pool:
+
+        def _persist(stage: str, fn: Callable, *args) -> Future | None:
+            if not persist:
+                return None
+
+            def _write():
+                with track(f"{stage}.persist"):
+                    return fn(*args)
+
+            fut = pool.submit(_write)
+            pending.append(fut)
+            return fut
+
+        clean_written = None
+        for stage in (s for s in STAGES if s in stages):
+            if stage == "compact":
+                # Compaction works on the CLEAN files: wait for today's partition.
+                # compact_silver records its own metrics.
+                if clean_written is not None:
+                    clean_written.result()
+                compact_silver()
+                continue
+
+            with track(stage) as rec:
+                if stage == "fetch":
+                    # Imported here: requests only for runs that fetch
+                    from ingestion import fetch_weather as fw
+
+                    today = datetime.date.fromisoformat(run_date)
+                    outputs["raw"] = fw.fetch_in_memory(
+                        today, full_refresh=full_refresh
+                    )
+                    rec["rows_out"] = sum(
+                        len(p["daily"]["time"]) for p in outputs["raw"]
+                    )
+                    _persist(stage, fw.persist_raw, run_date, outputs["raw"])
+
+                elif stage == "clean":
+                    blobs = outputs.get("raw")
+                    if blobs is None:
+                        blobs = iter_city_blobs(raw_path(base_dir, run_date))
+                    with track("clean.flatten") as step:
+                        outputs["clean"] = cw.flatten_city_blobs(blobs, run_date)
+                        step["rows_out"] = rec["rows_out"] = len(outputs["clean"])
+                    # With validation in the run, the partition is written once
+                    # validated (valid rows only)
+                    if "validate" not in stages:
+                        clean_written = _persist(
+                            stage, cw.write_clean, outputs["clean"], run_date
+                        )
+
+                elif stage == "validate":
+                    if "clean" in outputs:
+                        rec["rows_in"] = len(outputs["clean"])
+                        with track("validate.rules", rows_in=rec["rows_in"]) as step:
+                            outputs["clean"], quarantine, counts = vw.validate_frame(
+                                outputs["clean"]
+                            )
+                            step["rows_out"] = rec["rows_in"] - len(outputs["clean"])
+                        vw.log_counts(run_date, rec["rows_in"], counts)
+                        rec.update(
+                            rows_out=len(outputs["clean"]),
+                            quarantined=step["rows_out"],
+                            rules=counts,
+                        )
+                        clean_written = _persist(
+                            stage,
+                            vw.write_validated,
+                            outputs["clean"],
+                            quarantine,
+                            run_date,
+                        )
+                    else:
+                        vw.validate_partition(base_dir, run_date, False, rec)
+
+                elif stage == "gold":
+                    if "clean" in outputs:
+                        silver = _silver_with_today(outputs["clean"], run_date)
+                    else:
+                        silver = read_silver(gw.DATA_DIR, columns=gw.BASE_COLUMNS)
+                    rec["rows_in"] = len(silver)
+                    _, daily_kpi, monthly_kpi = gw.gold_from_silver(silver)
+                    outputs["gold"] = gw.gold_outputs(daily_kpi, monthly_kpi, run_date)
+                    rec["rows_out"] = len(daily_kpi)
+                    _persist(stage, gw.write_gold_outputs, outputs["gold"], run_date)
+
+                elif stage == "load":
+                    outputs["load"] = _load(outputs)
+                    rec["rows_in"] = sum(outputs["load"].values())
+
+            logger.info(f"Stage {stage} done in {rec['wall_s']:.2f}s")
+
+        # Surface persistence errors (the pool also waits on exit)
+        for fut in pending:
+            fut.result()
+
+    for stage in STAGES:
+        if stage in stages and stage != "compact":
+            write_metrics(base_dir, run_date, stage)
+
+    logger.info(
+        f"Pipeline {run_date} finished in {time.perf_counter() - t_run:.2f}s "
+        f"(stages={[s for s in STAGES if s in stages]}, persist={persist})"
+    )
+    return outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run pipeline stages in one process")
+    parser.add_argument("--run-date", help="Partition to build (default: today)")
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help=f"Comma-separated subset of {','.join(STAGES)}",
+    )
+    parser.add_argument(
+        "--no-persist",
+        action="store_true",
+        help="Keep RAW/CLEAN/GOLD in memory only (nothing written but Postgres)",
+    )
+    parser.add_argument("--full-refresh", action="store_true")
+    args = parser.parse_args()
+    run_pipeline(
+        args.run_date,
+        stages=[s.strip() for s in args.stages.split(",") if s.strip()],
+        persist=not args.no_persist,
+        full_refresh=args.full_refresh,
+    )
@@ -48,3 +48,16 @@ CREATE TABLE IF NOT EXISTS weather.weather_silver (
     run_date DATE,
     PRIMARY KEY (city_code, date)
 );
+
+-- Manifest de cargas: un registro por archivo parquet cargado en cada tabla
+-- (el loader salta los archivos que no cambiaron desde la ultima carga)
+CREATE TABLE IF NOT EXISTS weather.load_manifest (
+    target_table TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size_bytes BIGINT NOT NULL,
+    mtime DOUBLE PRECISION NOT NULL,
+    content_hash TEXT NOT NULL,
+    row_count BIGINT NOT NULL,
+    loaded_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (target_table, path)
+);
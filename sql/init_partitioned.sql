@@ -0,0 +1,158 @@
+-- Variante particionada de init.sql para historiales grandes.
+-- weather_silver y weather_daily se particionan por rango mensual de date:
+-- las consultas por rango de fechas solo leen los meses que tocan.
+-- El loader (loaders/load_to_pg.py) crea las particiones que falten con
+-- weather.ensure_month_partitions() antes de cada carga y refresca el rollup
+-- mensual con weather.refresh_daily_rollup() despues.
+
+CREATE SCHEMA IF NOT EXISTS weather;
+
+-- kpis daily - Datos diarios por ciudad y fecha (particionado por mes)
+CREATE TABLE IF NOT EXISTS weather.weather_daily (
+  run_date   date NOT NULL,
+  city_code  text NOT NULL,
+  date       date NOT NULL,
+  temp_min   double precision,
+  temp_max   double precision,
+  temp_avg   double precision,
+  temp_range double precision,
+  precip_mm  double precision,
+  PRIMARY KEY (city_code, date)
+) PARTITION BY RANGE (date);
+
+-- Tabla weather.weather_daily_kpis (KPIs diarios)
+CREATE TABLE IF NOT EXISTS weather.weather_daily_kpis (
+    run_date DATE NOT NULL,
+    city_code TEXT NOT NULL,
+    avg_temp_min DOUBLE PRECISION,
+    avg_temp_max DOUBLE PRECISION,
+    avg_precip_mm DOUBLE PRECISION,
+    PRIMARY KEY (city_code, run_date)
+);
+
+-- KPIs mensuales agregados por ciudad y mes
+CREATE TABLE IF NOT EXISTS weather.weather_monthly_kpis (
+  run_date     date NOT NULL,
+  city_code    text NOT NULL,
+  month        text NOT NULL,
+  avg_temp_min double precision,
+  avg_temp_max double precision,
+  avg_temp_avg double precision,
+  total_precip double precision,
+  PRIMARY KEY (city_code, month)
+);
+
+-- Silver table (particionada por mes)
+CREATE TABLE IF NOT EXISTS weather.weather_silver (
+    city_code TEXT NOT NULL,
+    date DATE NOT NULL,
+    temp_min DOUBLE PRECISION,
+    temp_max DOUBLE PRECISION,
+    temp_avg DOUBLE PRECISION,
+    temp_range DOUBLE PRECISION,
+    precip_mm DOUBLE PRECISION,
+    run_date DATE,
+    PRIMARY KEY (city_code, date)
+) PARTITION BY RANGE (date);
+
+-- Indices (se propagan a cada particion):
+-- BRIN sobre date: minimo tamaño, las filas llegan en orden de fecha
+-- cubriente (date, city_code) INCLUDE metricas: rangos de fechas de muchas
+-- ciudades con index-only scans; el PK (city_code, date) cubre una ciudad
+CREATE INDEX IF NOT EXISTS weather_daily_date_brin
+    ON weather.weather_daily USING brin (date);
+CREATE INDEX IF NOT EXISTS weather_daily_date_city_cov
+    ON weather.weather_daily (date, city_code)
+    INCLUDE (temp_min, temp_max, temp_avg, precip_mm);
+CREATE INDEX IF NOT EXISTS weather_silver_date_brin
+    ON weather.weather_silver USING brin (date);
+CREATE INDEX IF NOT EXISTS weather_silver_date_city_cov
+    ON weather.weather_silver (date, city_code)
+    INCLUDE (temp_min, temp_max, precip_mm);
+
+-- Crea las particiones mensuales <tabla>_pYYYY_MM que cubren [from_date, to_date].
+-- No hace nada si la tabla no esta particionada (esquema de init.sql).
+CREATE OR REPLACE FUNCTION weather.ensure_month_partitions(
+    parent text, from_date date, to_date date
+) RETURNS integer AS $$
+DECLARE
+    m date := date_trunc('month', from_date)::date;
+    part text;
+    created integer := 0;
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_partitioned_table
+        WHERE partrelid = to_regclass(format('weather.%I', parent))
+    ) THEN
+        RETURN 0;
+    END IF;
+    WHILE m <= to_date LOOP
+        part := format('%s_p%s', parent, to_char(m, 'YYYY_MM'));
+        IF to_regclass(format('weather.%I', part)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE weather.%I PARTITION OF weather.%I '
+                'FOR VALUES FROM (%L) TO (%L)',
+                part, parent, m, (m + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rollup mensual por ciudad sobre weather_daily para dashboards.
+-- Tabla (no materialized view) para poder refrescar solo los meses cargados.
+CREATE TABLE IF NOT EXISTS weather.weather_daily_monthly_rollup (
+    city_code    TEXT NOT NULL,
+    month        DATE NOT NULL,
+    days         INTEGER NOT NULL,
+    avg_temp_min DOUBLE PRECISION,
+    avg_temp_max DOUBLE PRECISION,
+    avg_temp_avg DOUBLE PRECISION,
+    min_temp     DOUBLE PRECISION,
+    max_temp     DOUBLE PRECISION,
+    total_precip DOUBLE PRECISION,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (month, city_code)
+);
+
+-- Recalcula el rollup de los meses que tocan [from_date, to_date]
+CREATE OR REPLACE FUNCTION weather.refresh_daily_rollup(
+    from_date date, to_date date
+) RETURNS integer AS $$
+DECLARE
+    lo date := date_trunc('month', from_date)::date;
+    hi date := (date_trunc('month', to_date) + interval '1 month')::date;
+    n integer;
+BEGIN
+    DELETE FROM weather.weather_daily_monthly_rollup
+    WHERE month >= lo AND month < hi;
+    INSERT INTO weather.weather_daily_monthly_rollup (
+        city_code, month, days, avg_temp_min, avg_temp_max, avg_temp_avg,
+        min_temp, max_temp, total_precip
+    )
+    SELECT city_code, date_trunc('month', date)::date, count(*),
+           avg(temp_min), avg(temp_max), avg(temp_avg),
+           min(temp_min), max(temp_max), sum(precip_mm)
+    FROM weather.weather_daily
+    WHERE date >= lo AND date < hi
+    GROUP BY 1, 2;
+    GET DIAGNOSTICS n = ROW_COUNT;
+    RETURN n;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Manifest de cargas: un registro por archivo parquet cargado en cada tabla
+-- (el loader salta los archivos que no cambiaron desde la ultima carga)
+CREATE TABLE IF NOT EXISTS weather.load_manifest (
+    target_table TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size_bytes BIGINT NOT NULL,
+    mtime DOUBLE PRECISION NOT NULL,
+    content_hash TEXT NOT NULL,
+    row_count BIGINT NOT NULL,
+    loaded_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (target_table, path)
+);
@@ -71,3 +71,106 @@ def test_clean_weather_empty_raw(tmp_path, monkeypatch):
     assert os.path.exists(out_parquet), "Clean parquet should exist even with empty RAW"
     df = pd.read_parquet(out_parquet)
     assert df.empty, "Parquet should be empty when RAW has no data"
+
+
+def test_clean_weather_streamed_ndjson(tmp_path, monkeypatch):
+    from ingestion.raw_store import RawWriter
+
+    run_date = "2025-01-17"
+    data_dir = str(tmp_path / "data")
+
+    def blob(code, tmax):
+        return {
+            "_city_code": code,
+            "daily": {
+                "time": ["2025-01-10"],
+                "temperature_2m_max": [tmax],
+                "temperature_2m_min": [10.0],
+                "precipitation_sum": [0.0],
+            },
+        }
+
+    with RawWriter(data_dir, run_date) as w:
+        w.write(blob("BUE", 30.0))
+        w.write(blob("SCL", 25.0))
+    # Same-day rerun refetching SCL replaces its line and keeps BUE
+    with RawWriter(data_dir, run_date, replace=["SCL"]) as w:
+        w.write(blob("SCL", 26.0))
+    # A crash mid-write leaves a truncated last line, which is skipped
+    with open(w.path, "a") as f:
+        f.write('{"_city_code": "MAD", "dai')
+
+    monkeypatch.setenv("DATA_DIR", data_dir)
+    df = pd.read_parquet(clean_weather(run_date=run_date)).sort_values("city_code")
+    assert list(df["city_code"]) == ["BUE", "SCL"]
+    assert list(df["temp_max"]) == [30.0, 26.0]
+
+
+def test_flatten_city_blobs_columnar():
+    from transformations.clean_weather import flatten_city_blobs
+
+    blobs = [
+        {
+            "_city_code": "SCL",
+            "daily": {
+                # Ragged arrays are truncated to the shortest one (zip semantics)
+                "time": ["2025-01-10", "2025-01-11", "2025-01-12"],
+                "temperature_2m_max": [25.0, None],
+                "temperature_2m_min": [15.0, 14.0],
+                "precipitation_sum": [0.0, 1.5],
+            },
+        },
+        {
+            "_city_code": "BUE",
+            "daily": {
+                "time": ["2025-01-10", "not-a-date"],
+                "temperature_2m_max": [30.0, 28.0],
+                "temperature_2m_min": [20.0, 18.0],
+                "precipitation_sum": [0.0, 5.2],
+            },
+        },
+    ]
+    df = flatten_city_blobs(blobs, "2025-01-15")
+
+    assert list(df["city_code"]) == ["SCL", "SCL", "BUE", "BUE"]
+    assert isinstance(df["city_code"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+    assert pd.isna(df.loc[3, "date"])  # invalid dates are coerced to NaT
+    assert pd.isna(df.loc[1, "temp_max"]) and pd.isna(df.loc[1, "temp_avg"])
+    assert df.loc[2, "temp_range"] == 10.0
+    assert (df["run_date"] == "2025-01-15").all()
+
+
+def test_backfill_clean_skips_up_to_date(tmp_path, monkeypatch):
+    from transformations.clean_weather import backfill_clean
+
+    def payload(run_date):
+        return {
+            "run_date": run_date,
+            "data": [
+                {
+                    "_city_code": "BUE",
+                    "daily": {
+                        "time": ["2025-01-10", "2025-01-11"],
+                        "temperature_2m_max": [30.0, 28.0],
+                        "temperature_2m_min": [20.0, 18.0],
+                        "precipitation_sum": [0.0, 5.2],
+                    },
+                }
+            ],
+        }
+
+    for rd in ["2025-01-10", "2025-01-11", "2025-01-12"]:
+        data_dir = _write_raw(tmp_path, rd, payload(rd))
+    monkeypatch.setenv("DATA_DIR", data_dir)
+
+    first = backfill_clean(start="2025-01-11", workers=2)
+    assert [(r["run_date"], r["status"], r["rows"]) for r in first] == [
+        ("2025-01-11", "cleaned", 2),
+        ("2025-01-12", "cleaned", 2),
+    ]
+    assert not os.path.exists(os.path.join(data_dir, "clean", "2025-01-10"))
+
+    # Outputs newer than their RAW input are skipped on the next run
+    second = backfill_clean(workers=2)
+    assert [r["status"] for r in second] == ["cleaned", "skipped", "skipped"]
@@ -0,0 +1,86 @@
+import os
+
+import pandas as pd
+
+from transformations.clean_weather import flatten_city_blobs
+from transformations.compact_silver import compact_silver
+from transformations.silver_store import read_silver, store_paths
+
+
+def _write_clean(data_dir, run_date, dates, tmax):
+    blobs = [
+        {
+            "_city_code": code,
+            "daily": {
+                "time": dates,
+                "temperature_2m_max": [tmax] * len(dates),
+                "temperature_2m_min": [10.0] * len(dates),
+                "precipitation_sum": [1.0] * len(dates),
+            },
+        }
+        for code in ["BUE", "MAD"]
+    ]
+    out_dir = os.path.join(data_dir, "clean", run_date)
+    os.makedirs(out_dir, exist_ok=True)
+    flatten_city_blobs(blobs, run_date).to_parquet(
+        os.path.join(out_dir, "weather.parquet"), index=False
+    )
+
+
+def test_compact_silver_last_run_wins(tmp_path, monkeypatch):
+    data_dir = str(tmp_path)
+    monkeypatch.setenv("DATA_DIR", data_dir)
+    _write_clean(data_dir, "2025-02-01", ["2025-01-30", "2025-01-31"], 20.0)
+    _write_clean(data_dir, "2025-02-02", ["2025-01-31", "2025-02-01"], 25.0)
+
+    summary = compact_silver()
+    assert summary == {"partitions": 2, "months": 2, "rows": 6}
+    assert [os.path.basename(os.path.dirname(p)) for p in store_paths(data_dir)] == [
+        "month=2025-01",
+        "month=2025-02",
+    ]
+
+    df = read_silver(data_dir).sort_values(["city_code", "date"])
+    # One row per city-date; the overlapping day comes from the latest run
+    assert not df.duplicated(["city_code", "date"]).any()
+    jan31 = df[df["date"] == pd.Timestamp("2025-01-31")]
+    assert set(jan31["temp_max"]) == {25.0}
+    assert set(jan31["run_date"]) == {"2025-02-02"}
+
+    # Up to date → nothing rewritten
+    assert compact_silver()["partitions"] == 0
+
+    # A new run only rewrites the months it touches
+    jan = store_paths(data_dir)[0]
+    jan_mtime = os.path.getmtime(jan)
+    _write_clean(data_dir, "2025-02-03", ["2025-02-01", "2025-02-02"], 30.0)
+    assert compact_silver() == {"partitions": 1, "months": 1, "rows": 4}
+    assert os.path.getmtime(jan) == jan_mtime
+    feb = read_silver(data_dir, start="2025-02-01")
+    assert len(feb) == 4 and set(feb["temp_max"]) == {30.0}
+
+
+def test_compact_silver_rewritten_and_removed_runs(tmp_path, monkeypatch):
+    data_dir = str(tmp_path)
+    monkeypatch.setenv("DATA_DIR", data_dir)
+    _write_clean(data_dir, "2025-02-01", ["2025-01-30", "2025-01-31"], 20.0)
+    _write_clean(data_dir, "2025-02-02", ["2025-01-31", "2025-02-01"], 25.0)
+    compact_silver()
+
+    # Rerun of 2025-02-02 without Jan 31: its old rows go in both months, the
+    # day falls back to the earlier run
+    _write_clean(data_dir, "2025-02-02", ["2025-02-01"], 26.0)
+    assert compact_silver() == {"partitions": 1, "months": 2, "rows": 6}
+    df = read_silver(data_dir).set_index(["city_code", "date"])
+    assert df.loc[("BUE", pd.Timestamp("2025-01-31")), "temp_max"] == 20.0
+    assert df.loc[("BUE", pd.Timestamp("2025-02-01")), "temp_max"] == 26.0
+
+    # Removed CLEAN partitions keep their rows in the store
+    os.remove(os.path.join(data_dir, "clean", "2025-02-01", "weather.parquet"))
+    assert compact_silver()["partitions"] == 0
+    _write_clean(data_dir, "2025-02-03", ["2025-02-02"], 30.0)
+    assert compact_silver() == {"partitions": 1, "months": 1, "rows": 4}
+    assert len(read_silver(data_dir)) == 8
+
+    # Only --full rebuilds from the partitions on disk
+    assert compact_silver(full=True)["rows"] == 4
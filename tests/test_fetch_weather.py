@@ -45,3 +45,159 @@ def test_fetch_city_weather_mock(monkeypatch):
 
     # Minimal sanity check del payload
     assert "daily" in out and "time" in out["daily"]
+
+
+def _start_stub_server(fail_first=0):
+    # Local Open-Meteo stand-in: echoes the requested coordinates and dates.
+    # The first `fail_first` requests answer 503 to exercise the retry path.
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    state = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            state["requests"] += 1
+            if state["requests"] <= fail_first:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            q = parse_qs(urlparse(self.path).query)
+            lats = q["latitude"][0].split(",")
+            lons = q["longitude"][0].split(",")
+            locations = [
+                {
+                    "latitude": float(lat),
+                    "longitude": float(lon),
+                    "daily": {
+                        "time": [q["start_date"][0], q["end_date"][0]],
+                        "temperature_2m_max": [30.0, 31.0],
+                        "temperature_2m_min": [20.0, 21.0],
+                        "precipitation_sum": [0.0, 1.0],
+                    },
+                }
+                for lat, lon in zip(lats, lons)
+            ]
+            # Open-Meteo answers a single object for one location, a list otherwise
+            body = json.dumps(
+                locations[0] if len(locations) == 1 else locations
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def test_fetch_cities_concurrent_stub_server(monkeypatch):
+    from ingestion import fetch_weather as fw
+
+    server, state = _start_stub_server(fail_first=1)
+    monkeypatch.setattr(
+        fw, "OPEN_METEO_URL", f"http://127.0.0.1:{server.server_port}/v1/forecast"
+    )
+    cities = [("BUE", -34.61, -58.38), ("SCL", -33.45, -70.66), ("MAD", 40.42, -3.7)]
+    try:
+        session = fw.make_session(pool_size=2, retries=2, backoff=0)
+        out = fw.fetch_cities_concurrent(
+            cities,
+            "2025-01-01",
+            "2025-01-31",
+            max_workers=2,
+            session=session,
+            batch_size=1,
+        )
+    finally:
+        server.shutdown()
+
+    # Same order and metadata as the sequential fetch_city_weather
+    assert [p["_city_code"] for p in out] == ["BUE", "SCL", "MAD"]
+    assert all(p["_start_date"] == "2025-01-01" for p in out)
+    assert all(p["_end_date"] == "2025-01-31" for p in out)
+    assert out[1]["latitude"] == -33.45
+    # One 503 retried + one request per city
+    assert state["requests"] == len(cities) + 1
+
+
+def test_fetch_cities_batched_requests(monkeypatch):
+    from ingestion import fetch_weather as fw
+
+    server, state = _start_stub_server()
+    monkeypatch.setattr(
+        fw, "OPEN_METEO_URL", f"http://127.0.0.1:{server.server_port}/v1/forecast"
+    )
+    cities = [
+        ("BUE", -34.61, -58.38),
+        ("SCL", -33.45, -70.66),
+        ("MAD", 40.42, -3.7),
+        ("MIA", 25.76, -80.19),
+        ("LIM", -12.05, -77.04),
+    ]
+    try:
+        out = fw.fetch_cities_concurrent(
+            cities, "2025-01-01", "2025-01-31", max_workers=2, batch_size=2
+        )
+    finally:
+        server.shutdown()
+
+    # 5 cities in chunks of 2 → 3 requests, split back per city in order
+    assert state["requests"] == 3
+    assert [p["_city_code"] for p in out] == ["BUE", "SCL", "MAD", "MIA", "LIM"]
+    assert [p["latitude"] for p in out] == [lat for _, lat, _ in cities]
+    assert all(p["_start_date"] == "2025-01-01" for p in out)
+    assert all(p["_end_date"] == "2025-01-31" for p in out)
+
+
+def test_plan_fetch_ranges_watermarks():
+    from datetime import date
+
+    from ingestion import fetch_weather as fw
+
+    cities = [("BUE", -34.61, -58.38), ("SCL", -33.45, -70.66), ("MAD", 40.42, -3.7)]
+    watermarks = {"BUE": "2025-01-14", "SCL": "2025-01-10"}
+    today = date(2025, 1, 16)
+
+    plan = fw.plan_fetch_ranges(cities, watermarks, today, days_back=30)
+    # BUE: only the missing day; SCL: gap backfill; MAD: no watermark → full window
+    assert plan[("2025-01-15", "2025-01-15")] == [cities[0]]
+    assert plan[("2025-01-11", "2025-01-15")] == [cities[1]]
+    assert plan[("2024-12-17", "2025-01-15")] == [cities[2]]
+
+    # Up-to-date cities are skipped
+    assert fw.plan_fetch_ranges(cities[:1], {"BUE": "2025-01-15"}, today) == {}
+
+    # Full refresh ignores watermarks
+    full = fw.plan_fetch_ranges(cities, watermarks, today, 30, full_refresh=True)
+    assert full == {("2024-12-17", "2025-01-15"): cities}
+
+    # A watermark stuck far back backfills from the floor only
+    stuck = fw.plan_fetch_ranges(cities[:1], {"BUE": "2023-01-01"}, today)
+    assert stuck == {("2024-01-17", "2025-01-15"): cities[:1]}
+
+
+def test_last_complete_day_stops_at_gap():
+    from ingestion import fetch_weather as fw
+
+    payload = {
+        "daily": {
+            "time": ["2025-01-10", "2025-01-11", "2025-01-12"],
+            "temperature_2m_max": [30.0, None, 31.0],
+            "temperature_2m_min": [20.0, 21.0, 22.0],
+            "precipitation_sum": [0.0, 0.0, 0.0],
+        }
+    }
+    assert fw._last_complete_day(payload) == "2025-01-10"
+    # A null older than the settle window is final: the watermark moves past it
+    assert fw._last_complete_day(payload, "2025-01-12") == "2025-01-12"
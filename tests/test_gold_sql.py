@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from loaders import load_to_pg as lp
+from models import gold_sql
+from models import gold_weather as gw
+
+
+@pytest.fixture
+def pg_engine(monkeypatch, tmp_path):
+    dsn = os.getenv("PG_TEST_DSN")
+    if not dsn:
+        pytest.skip("PG_TEST_DSN not set")
+    engine = create_engine(dsn)
+    init_sql = os.path.join(os.path.dirname(__file__), "..", "sql", "init.sql")
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS weather CASCADE"))
+        conn.connection.cursor().execute(open(init_sql).read())
+    monkeypatch.setattr(lp, "engine", engine)
+    monkeypatch.setattr(gw, "DATA_DIR", str(tmp_path))
+    yield engine
+    engine.dispose()
+
+
+def _silver(seed=0):
+    # 1-decimal values like the API's: 14-row means and monthly means often land
+    # exactly on a .x5 tie, so this also pins down the summation order
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2023-12-20", "2025-03-31", freq="D")
+    frames = []
+    for code in ["BUE", "MAD", "SCL"]:
+        n = len(dates)
+        tmax = np.round(rng.uniform(0, 35, n), 1)
+        tmin = np.round(tmax - rng.uniform(2, 12, n), 1)
+        tmax[rng.random(n) < 0.05] = np.nan
+        tmin[::11] = 0.0  # zero prior values → no % change
+        prcp = np.round(rng.gamma(0.6, 4.0, n), 1)
+        prcp[rng.random(n) < 0.05] = np.nan
+        keep = rng.random(n) > 0.03  # gaps: rolling windows count rows, not days
+        frames.append(
+            pd.DataFrame(
+                {
+                    "run_date": "2025-04-01",
+                    "city_code": code,
+                    "date": dates,
+                    "temp_max": tmax,
+                    "temp_min": tmin,
+                    "precip_mm": prcp,
+                    "temp_avg": (tmax + tmin) / 2,
+                    "temp_range": tmax - tmin,
+                }
+            )[keep]
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_sql_engine_matches_pandas(pg_engine, monkeypatch):
+    monkeypatch.setattr(gw, "COMPARE_HORIZONS", ["week", "month", "year"])
+    silver = _silver()
+    columns = lp.table_specs(compacted=False)[0]["columns"]
+    silver[columns].to_sql(
+        "weather_silver", pg_engine, schema="weather", if_exists="append", index=False
+    )
+
+    frame = silver[gw.BASE_COLUMNS].copy()
+    frame["city_code"] = pd.Categorical(frame["city_code"])
+    _, daily, monthly = gw.gold_from_silver(frame)
+    sql_daily, sql_monthly = gold_sql.gold_frames()
+
+    daily = daily.reset_index(drop=True)
+    daily["city_code"] = daily["city_code"].astype(str)
+    assert list(sql_daily.columns) == list(daily.columns)
+    pd.testing.assert_frame_equal(sql_daily, daily, check_dtype=False, check_exact=True)
+    monthly = monthly.reset_index(drop=True)
+    monthly["city_code"] = monthly["city_code"].astype(str)
+    pd.testing.assert_frame_equal(
+        sql_monthly, monthly, check_dtype=False, check_exact=True
+    )
+
+    counts = gold_sql.build_gold_sql("2025-04-01")
+    assert counts["weather_daily"] == len(daily)
+    assert counts["weather_monthly_kpis"] == len(monthly)
+    assert counts["weather_daily_kpis"] == 3
+    enriched = pd.read_sql(
+        "SELECT * FROM weather.weather_daily_enriched ORDER BY city_code, date",
+        pg_engine,
+    )
+    assert len(enriched) == len(daily) and "temp_max_yoy_pct" in enriched
+
+
+def test_sql_engine_warns_on_partition_loaded_silver(pg_engine, caplog):
+    silver = _silver().head(10)
+    columns = lp.table_specs(compacted=False)[0]["columns"]
+    silver[columns].to_sql(
+        "weather_silver", pg_engine, schema="weather", if_exists="append", index=False
+    )
+    assert not gold_sql.silver_from_partitions()
+
+    with pg_engine.begin() as conn:
+        lp.record_manifest(
+            conn,
+            "weather_silver",
+            {
+                "path": os.path.join(lp.DATA_DIR, "clean", "2025-04-01", "w.parquet"),
+                "size_bytes": 1,
+                "mtime": 0.0,
+                "content_hash": "-",
+            },
+            10,
+        )
+    assert gold_sql.silver_from_partitions()
+    gold_sql.build_gold_sql("2025-04-01")
+    assert "loaded from daily CLEAN partitions" in caplog.text
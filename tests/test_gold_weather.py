@@ -0,0 +1,266 @@
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models import gold_weather as gw
+from transformations.clean_weather import flatten_city_blobs
+from transformations.compact_silver import compact_silver
+
+
+def _write_silver(data_dir, run_date, start, days, seed):
+    # Silver partition in the same shape clean_weather writes
+    rng = np.random.default_rng(seed)
+    times = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+    blobs = []
+    for code in ["BUE", "MAD", "SCL"]:
+        tmax = np.round(rng.uniform(10, 35, days), 1)
+        blobs.append(
+            {
+                "_city_code": code,
+                "daily": {
+                    "time": times,
+                    "temperature_2m_max": tmax.tolist(),
+                    "temperature_2m_min": np.round(
+                        tmax - rng.uniform(3, 12, days), 1
+                    ).tolist(),
+                    "precipitation_sum": np.round(rng.uniform(0, 9, days), 2).tolist(),
+                },
+            }
+        )
+    out_dir = os.path.join(data_dir, "clean", run_date)
+    os.makedirs(out_dir, exist_ok=True)
+    flatten_city_blobs(blobs, run_date).to_parquet(
+        os.path.join(out_dir, "weather.parquet"), index=False
+    )
+
+
+def _read_gold(out_dir):
+    frames = {}
+    for name in [
+        "weather_daily_enriched",
+        "weather_daily_kpis",
+        "weather_monthly_kpis",
+    ]:
+        df = pd.read_parquet(os.path.join(out_dir, f"{name}.parquet"))
+        df["city_code"] = df["city_code"].astype(str)
+        frames[name] = df
+    return frames
+
+
+@pytest.fixture
+def silver_history(tmp_path, monkeypatch):
+    data_dir = str(tmp_path / "data")
+    monkeypatch.setattr(gw, "DATA_DIR", data_dir)
+    # ~14 months of history so YoY lookups find prior-year rows
+    _write_silver(data_dir, "2025-03-01", date(2024, 1, 1), 425, seed=1)
+    _write_silver(data_dir, "2025-03-02", date(2025, 1, 31), 30, seed=2)
+    return data_dir
+
+
+def test_build_gold_outputs(silver_history):
+    out = _read_gold(gw.build_gold("2025-03-02"))
+    daily = out["weather_daily_enriched"]
+    assert daily["temp_max_ly"].notna().any()
+    assert set(out["weather_monthly_kpis"]["month"]) >= {"2024-01", "2025-03"}
+    assert (daily["run_date"] == "2025-03-02").all()
+    # Feb 29 2024 must not add a second prior-year match for Feb 28 2025
+    assert not daily.duplicated(["city_code", "date"]).any()
+
+
+def test_incremental_gold_matches_full_rebuild(silver_history, tmp_path):
+    gw.build_gold("2025-03-02")
+
+    # New run overlapping the last days with revised values + new days
+    _write_silver(silver_history, "2025-03-03", date(2025, 2, 20), 20, seed=3)
+    incremental = _read_gold(gw.build_gold("2025-03-03", incremental=True))
+
+    # Full rebuild from scratch on the same SILVER
+    os.rename(
+        os.path.join(silver_history, "gold"), os.path.join(str(tmp_path), "old_gold")
+    )
+    full = _read_gold(gw.build_gold("2025-03-03"))
+
+    for name, df in full.items():
+        pd.testing.assert_frame_equal(incremental[name], df, check_dtype=False)
+
+    # Nothing changed since the last build → outputs are carried over as-is
+    again = _read_gold(gw.build_gold("2025-03-04", incremental=True))
+    for name, df in full.items():
+        pd.testing.assert_frame_equal(
+            again[name].drop(columns="run_date"),
+            df.drop(columns="run_date"),
+            check_dtype=False,
+        )
+
+
+def test_incremental_gold_before_compaction(silver_history, tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", silver_history)
+    compact_silver()
+    gw.build_gold("2025-03-02")
+
+    # New run: GOLD runs before it is compacted, then again after
+    _write_silver(silver_history, "2025-03-03", date(2025, 2, 20), 20, seed=3)
+    gw.build_gold("2025-03-03", incremental=True)
+    compact_silver()
+    incremental = _read_gold(gw.build_gold("2025-03-04", incremental=True))
+    assert str(incremental["weather_daily_enriched"]["date"].max()) == "2025-03-11"
+
+    os.rename(
+        os.path.join(silver_history, "gold"), os.path.join(str(tmp_path), "old_gold")
+    )
+    full = _read_gold(gw.build_gold("2025-03-04"))
+    for name, df in full.items():
+        pd.testing.assert_frame_equal(incremental[name], df, check_dtype=False)
+
+
+def test_add_rolling_configurable_windows():
+    daily = pd.DataFrame(
+        {
+            "city_code": ["BUE"] * 4 + ["MAD"] * 2,
+            "date": pd.to_datetime(
+                ["2025-01-01", "2025-01-02", "2025-01-03", "2025-01-04"]
+                + ["2025-01-01", "2025-01-02"]
+            ),
+            "temp_max": [10.0, 20.0, None, 40.0, 5.0, 7.0],
+            "temp_min": [1.0, 2.0, 3.0, 4.0, 0.0, 2.0],
+        }
+    )
+    out = gw._add_rolling(daily, windows=[2, 3])
+
+    # Windows restart per city and skip NaNs (min_periods=1)
+    assert out["avg_max_2d"].tolist() == [10.0, 15.0, 20.0, 40.0, 5.0, 6.0]
+    assert out["avg_max_3d"].tolist() == [10.0, 15.0, 15.0, 30.0, 5.0, 6.0]
+    assert out["avg_min_3d"].tolist() == [1.0, 1.5, 2.0, 3.0, 0.0, 1.0]
+
+
+def test_rolling_long_windows_exact_and_start_independent():
+    rng = np.random.default_rng(4)
+    n = 400
+    tmax = np.round(rng.normal(20, 6, 2 * n), 1)
+    tmax[rng.random(2 * n) < 0.05] = np.nan
+    daily = pd.DataFrame(
+        {
+            "city_code": ["BUE"] * n + ["MAD"] * n,
+            "date": np.tile(pd.date_range("2024-01-01", periods=n), 2),
+            "temp_max": tmax,
+            "temp_min": np.round(tmax - 7.3, 1),
+        }
+    )
+    out = gw._add_rolling(daily.copy(), windows=[90])
+    expected = (
+        daily.groupby("city_code")["temp_max"]
+        .rolling(90, min_periods=1)
+        .mean()
+        .to_numpy()
+    )
+    np.testing.assert_allclose(out["avg_max_90d"], expected, rtol=1e-12)
+
+    # Same bits when the frame starts later (incremental context), once the
+    # window is full
+    tail = gw._add_rolling(daily.iloc[200:].copy(), windows=[90])
+    full = out.iloc[200:]
+    keep = (tail["city_code"] == "MAD").to_numpy() | (np.arange(len(tail)) >= 89)
+    np.testing.assert_array_equal(
+        tail["avg_max_90d"].to_numpy()[keep], full["avg_max_90d"].to_numpy()[keep]
+    )
+
+
+def test_prior_period_lookup_handles_leap_day():
+    dates = ["2023-02-28", "2024-02-28", "2024-02-29", "2024-03-07", "2024-03-31"]
+    dates += ["2025-02-28"]
+    daily = pd.DataFrame(
+        {
+            "city_code": ["BUE"] * 6 + ["MAD"] * 2,
+            "date": pd.to_datetime(dates + ["2023-02-28", "2024-02-29"]),
+            "temp_max": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 10.0, 20.0],
+            "temp_min": [0.0, 0.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0],
+        }
+    )
+    out = gw._add_prior_period(daily, horizons=["week", "month", "year"])
+    assert len(out) == len(daily)
+    by_date = out.set_index(["city_code", out["date"].dt.strftime("%Y-%m-%d")])
+
+    # Feb 29 → Feb 28 of the prior year; Feb 28 after a leap year → Feb 28
+    assert by_date.loc[("BUE", "2024-02-29"), "temp_max_ly"] == 1.0
+    assert by_date.loc[("BUE", "2025-02-28"), "temp_max_ly"] == 2.0
+    assert by_date.loc[("BUE", "2024-02-29"), "temp_max_yoy_pct"] == 200.0
+    # Week / month (Mar 31 → Feb 29), never across cities
+    assert by_date.loc[("BUE", "2024-03-07"), "temp_max_lw"] == 3.0
+    assert by_date.loc[("BUE", "2024-03-31"), "temp_max_lm"] == 3.0
+    assert by_date.loc[("MAD", "2024-02-29"), "temp_max_ly"] == 10.0
+    # Zero prior value → no % change
+    assert np.isnan(by_date.loc[("BUE", "2024-02-29"), "temp_min_yoy_pct"])
+    assert np.isnan(by_date.loc[("BUE", "2024-02-29"), "temp_max_lw"])
+
+    with pytest.raises(ValueError):
+        gw._add_prior_period(daily, horizons=["decade"])
+
+
+def test_sharded_gold_matches_single_process(silver_history, tmp_path, monkeypatch):
+    single = _read_gold(gw.build_gold("2025-03-02"))
+    os.rename(
+        os.path.join(silver_history, "gold"), os.path.join(str(tmp_path), "old_gold")
+    )
+    monkeypatch.setattr(gw, "GOLD_SHARDS", 3)
+    assert len({gw.city_shard(c, 3) for c in ["BUE", "MAD", "SCL"]}) > 1
+    sharded = _read_gold(gw.build_gold("2025-03-02", workers=2))
+
+    for name, df in single.items():
+        pd.testing.assert_frame_equal(sharded[name], df)
+
+
+def test_streaming_gold_matches_in_memory(silver_history, tmp_path, monkeypatch):
+    single = _read_gold(gw.build_gold("2025-03-02"))
+    os.rename(
+        os.path.join(silver_history, "gold"), os.path.join(str(tmp_path), "old_gold")
+    )
+    # 1 MB → 1000 SILVER rows per batch: BUE + MAD (455 rows each), then SCL
+    monkeypatch.setattr(gw, "GOLD_BYTES_PER_ROW", 2**20 // 1000)
+    dataset = gw.silver_dataset(silver_history)
+    assert gw.plan_city_batches(gw.city_row_counts(dataset), 1000) == [
+        ["BUE", "MAD"],
+        ["SCL"],
+    ]
+    streamed = _read_gold(gw.build_gold("2025-03-02", memory_mb=1))
+    for name, df in single.items():
+        pd.testing.assert_frame_equal(streamed[name], df)
+
+    # The streamed state feeds incremental builds like an in-memory one
+    _write_silver(silver_history, "2025-03-03", date(2025, 2, 20), 20, seed=3)
+    incremental = _read_gold(gw.build_gold("2025-03-03", incremental=True))
+    os.rename(
+        os.path.join(silver_history, "gold"), os.path.join(str(tmp_path), "streamed")
+    )
+    full = _read_gold(gw.build_gold("2025-03-03"))
+    for name, df in full.items():
+        pd.testing.assert_frame_equal(incremental[name], df, check_dtype=False)
+
+
+def test_streaming_gold_splits_large_cities(
+    silver_history, tmp_path, monkeypatch, caplog
+):
+    monkeypatch.setattr(gw, "ROLLING_WINDOWS", [7, 30])
+    monkeypatch.setattr(gw, "MAX_WINDOW", 30)
+    monkeypatch.setattr(gw, "COMPARE_HORIZONS", ["week", "month", "year"])
+    single = _read_gold(gw.build_gold("2025-03-02"))
+    old = os.path.join(str(tmp_path), "old_gold")
+    os.rename(os.path.join(silver_history, "gold"), old)
+
+    # 40 SILVER rows per batch: every city goes in runs of whole months, Feb 2025
+    # (both runs, 56 rows) alone and above the budget
+    monkeypatch.setattr(gw, "GOLD_BYTES_PER_ROW", 2**20 // 40)
+    months = gw.city_month_counts(gw.silver_dataset(silver_history), "BUE")
+    assert months["2025-02"] == 56 and months.sum() == 455
+    streamed = _read_gold(gw.build_gold("2025-03-02", memory_mb=1))
+    assert "BUE has 56 SILVER rows in 2025-02" in caplog.text
+
+    for name, df in single.items():
+        pd.testing.assert_frame_equal(streamed[name], df)
+    state = os.path.join("_state", "daily_base.parquet")
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(os.path.join(silver_history, "gold", state)),
+        pd.read_parquet(os.path.join(old, state)),
+    )
@@ -0,0 +1,92 @@
+import os
+import time
+
+from ingestion.http_cache import ResponseCache
+
+URL = "https://api.open-meteo.com/v1/forecast"
+
+
+def _params(lat):
+    return {
+        "latitude": lat,
+        "longitude": -58.38,
+        "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum",
+        "start_date": "2025-01-01",
+        "end_date": "2025-01-31",
+    }
+
+
+def test_cache_hit_miss_and_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl_seconds=60, max_bytes=10_000_000)
+    assert cache.get(URL, _params(-34.61)) is None
+
+    cache.put(URL, _params(-34.61), {"daily": {"time": ["2025-01-10"]}})
+    assert cache.get(URL, _params(-34.61)) == {"daily": {"time": ["2025-01-10"]}}
+    # Different params → different key
+    assert cache.get(URL, _params(-33.45)) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Expired entries are misses and get removed
+    expired = ResponseCache(str(tmp_path), ttl_seconds=0, max_bytes=10_000_000)
+    time.sleep(0.01)
+    assert expired.get(URL, _params(-34.61)) is None
+    assert not os.listdir(tmp_path)
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl_seconds=60, max_bytes=10_000_000)
+    body = {"daily": {"time": ["2025-01-10"] * 50}}
+    cache.put(URL, _params(1.0), body)
+    entry_size = sum(e[2] for e in cache._entries())
+    cache.max_bytes = int(entry_size * 2.5)  # room for two entries
+
+    cache.put(URL, _params(2.0), body)
+    os.utime(cache._path(cache.key(URL, _params(1.0))), (0, 0))
+    os.utime(cache._path(cache.key(URL, _params(2.0))), (1, 1))
+    assert cache.get(URL, _params(1.0)) is not None  # refreshes 1.0 → 2.0 is LRU
+    cache.put(URL, _params(3.0), body)
+
+    assert cache.evictions == 1
+    assert cache.get(URL, _params(2.0)) is None
+    assert cache.get(URL, _params(1.0)) is not None
+    assert cache.get(URL, _params(3.0)) is not None
+
+
+def test_cache_hit_survives_concurrent_eviction(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path), ttl_seconds=60, max_bytes=10_000_000)
+    cache.put(URL, _params(1.0), {"daily": {"time": ["2025-01-10"]}})
+
+    def _evicted(path, *args):
+        # Another thread's put() evicts the entry between the read and utime
+        os.remove(path)
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", _evicted)
+    assert cache.get(URL, _params(1.0)) == {"daily": {"time": ["2025-01-10"]}}
+    assert cache.hits == 1
+
+
+def test_fetch_replays_cached_response_offline(tmp_path, monkeypatch):
+    from ingestion import fetch_weather as fw
+
+    cache = ResponseCache(str(tmp_path), ttl_seconds=60, max_bytes=10_000_000)
+    params = {
+        "latitude": -34.61,
+        "longitude": -58.38,
+        "daily": fw.DAILY_VARIABLES,
+        "timezone": "auto",
+        "start_date": "2025-01-01",
+        "end_date": "2025-01-31",
+    }
+    cache.put(fw.OPEN_METEO_URL, params, {"daily": {"time": ["2025-01-10"]}})
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("cached request should not hit the network")
+
+    monkeypatch.setattr(fw.requests, "get", no_network)
+    out = fw.fetch_city_weather(
+        "BUE", -34.61, -58.38, "2025-01-01", "2025-01-31", cache=cache
+    )
+    assert out["_city_code"] == "BUE"
+    assert out["daily"]["time"] == ["2025-01-10"]
+    assert cache.hits == 1
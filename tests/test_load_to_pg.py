@@ -0,0 +1,325 @@
+import datetime
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from loaders import load_to_pg as lp
+
+SILVER_COLUMNS = [
+    "run_date",
+    "city_code",
+    "date",
+    "temp_min",
+    "temp_max",
+    "temp_avg",
+    "precip_mm",
+]
+
+
+def test_staging_upsert_sql():
+    sql = lp.staging_upsert_sql(
+        '"weather"."weather_silver"',
+        "stg",
+        ["city_code", "date", "temp_max"],
+        ["city_code", "date"],
+    )
+    assert 'SELECT DISTINCT ON ("city_code", "date")' in sql
+    assert sql.endswith('ON CONFLICT ("city_code", "date") DO NOTHING')
+
+    sql = lp.staging_upsert_sql(
+        "t",
+        "stg",
+        ["city_code", "date", "temp_max"],
+        ["city_code", "date"],
+        do_update=True,
+    )
+    assert sql.endswith('DO UPDATE SET "temp_max" = EXCLUDED."temp_max"')
+
+
+def test_plan_loads_uses_manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(lp, "DATA_DIR", str(tmp_path))
+    a, b = tmp_path / "a.parquet", tmp_path / "b.parquet"
+    a.write_bytes(b"aaaa")
+    b.write_bytes(b"bbbb")
+
+    to_load, touched = lp.plan_loads([str(a), str(b)], {})
+    assert [i["path"] for i in to_load] == [str(a), str(b)] and not touched
+
+    manifest = {
+        lp._manifest_path(i["path"]): {**i, "path": lp._manifest_path(i["path"])}
+        for i in to_load
+    }
+    assert lp.plan_loads([str(a), str(b)], manifest) == ([], [])
+
+    # a: rewritten with the same bytes → touched only; b: new content → reload
+    os.utime(a, (1, 1))
+    b.write_bytes(b"bbbbb")
+    to_load, touched = lp.plan_loads([str(a), str(b)], manifest)
+    assert [i["path"] for i in to_load] == [str(b)]
+    assert [i["path"] for i in touched] == [str(a)]
+
+    to_load, _ = lp.plan_loads([str(a), str(b)], manifest, force=True)
+    assert len(to_load) == 2
+
+
+# Integration tests: run against a throwaway Postgres, e.g.
+#   PG_TEST_DSN=postgresql+psycopg2://postgres@localhost:5432/weather_test pytest
+@pytest.fixture
+def pg_engine(monkeypatch, tmp_path):
+    dsn = os.getenv("PG_TEST_DSN")
+    if not dsn:
+        pytest.skip("PG_TEST_DSN not set")
+    engine = create_engine(dsn)
+    init_sql = os.path.join(os.path.dirname(__file__), "..", "sql", "init.sql")
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS weather CASCADE"))
+        conn.connection.cursor().execute(open(init_sql).read())
+    monkeypatch.setattr(lp, "engine", engine)
+    monkeypatch.setattr(lp, "DATA_DIR", str(tmp_path))
+    yield engine
+    engine.dispose()
+
+
+def _write_silver(data_dir, run_date, tmax):
+    out_dir = os.path.join(data_dir, "clean", run_date)
+    os.makedirs(out_dir, exist_ok=True)
+    df = pd.DataFrame(
+        {
+            "run_date": run_date,
+            "city_code": ["BUE", "BUE", "MAD", "BUE"],
+            "date": pd.to_datetime(
+                ["2025-01-10", "2025-01-11", "2025-01-10", "2025-01-10"]
+            ),
+            "temp_max": [tmax, tmax + 1, tmax + 2, 99.0],  # last row: duplicate key
+            "temp_min": [10.0, None, 12.0, 0.0],
+            "temp_avg": [15.0, None, 17.0, 0.0],
+            "precip_mm": [0.0, 1.5, 0.2, 0.0],
+        }
+    )
+    df.to_parquet(os.path.join(out_dir, "weather.parquet"), index=False)
+
+
+def _silver(engine):
+    return pd.read_sql(
+        "SELECT city_code, date, temp_max, temp_min, run_date FROM weather.weather_silver "
+        "ORDER BY city_code, date",
+        engine,
+    )
+
+
+@pytest.mark.parametrize("method", ["copy", "insert"])
+def test_load_weather_table_upsert_modes(pg_engine, tmp_path, method):
+    _write_silver(str(tmp_path), "2025-01-12", 30.0)
+    args = dict(
+        parquet_glob="clean/*/weather.parquet",
+        table_name="weather_silver",
+        columns=SILVER_COLUMNS,
+        conflict_keys=["city_code", "date"],
+        method=method,
+    )
+    lp.load_weather_table(**args)
+    df = _silver(pg_engine)
+    assert len(df) == 3
+    # First row per key wins, NULLs survive
+    assert df["temp_max"].tolist() == [30.0, 31.0, 32.0]
+    assert pd.isna(df.loc[1, "temp_min"])
+
+    # Re-run with new values: DO NOTHING keeps, DO UPDATE refreshes
+    _write_silver(str(tmp_path), "2025-01-12", 20.0)
+    lp.load_weather_table(**args)
+    assert _silver(pg_engine)["temp_max"].tolist() == [30.0, 31.0, 32.0]
+    lp.load_weather_table(**args, do_update=True)  # file unchanged → skipped
+    assert _silver(pg_engine)["temp_max"].tolist() == [30.0, 31.0, 32.0]
+    lp.load_weather_table(**args, do_update=True, force=True)
+    assert _silver(pg_engine)["temp_max"].tolist() == [20.0, 21.0, 22.0]
+
+
+def test_load_weather_table_skips_loaded_files(pg_engine, tmp_path):
+    _write_silver(str(tmp_path), "2025-01-12", 30.0)
+    args = dict(
+        parquet_glob="clean/*/weather.parquet",
+        table_name="weather_silver",
+        columns=SILVER_COLUMNS,
+        conflict_keys=["city_code", "date"],
+    )
+    assert lp.load_weather_table(**args) == 4
+    assert lp.load_weather_table(**args) == 0
+
+    _write_silver(str(tmp_path), "2025-01-13", 30.0)
+    assert lp.load_weather_table(**args) == 4
+    manifest = pd.read_sql(
+        "SELECT path, row_count FROM weather.load_manifest ORDER BY path", pg_engine
+    )
+    assert manifest["path"].tolist() == [
+        os.path.join("clean", "2025-01-12", "weather.parquet"),
+        os.path.join("clean", "2025-01-13", "weather.parquet"),
+    ]
+    assert manifest["row_count"].tolist() == [4, 4]
+
+
+def test_load_tables_parallel_is_atomic_per_file(pg_engine, tmp_path):
+    # Compacted SILVER: month files are key-disjoint → loaded concurrently
+    for month, day in [("2025-01", "2025-01-10"), ("2025-02", "2025-02-10")]:
+        out_dir = tmp_path / "silver" / f"month={month}"
+        out_dir.mkdir(parents=True)
+        pd.DataFrame(
+            {
+                "run_date": "2025-02-11",
+                "city_code": ["BUE", "MAD"],
+                "date": pd.to_datetime([day, day]),
+                "temp_max": [30.0, 20.0],
+            }
+        ).to_parquet(out_dir / "weather.parquet", index=False)
+    # A broken file (NULL key) must roll back alone
+    bad_dir = tmp_path / "silver" / "month=2025-03"
+    bad_dir.mkdir(parents=True)
+    pd.DataFrame(
+        {"run_date": ["2025-03-02"], "city_code": [None], "date": ["2025-03-01"]}
+    ).to_parquet(bad_dir / "weather.parquet", index=False)
+
+    specs = lp.table_specs(compacted=True)
+    with pytest.raises(Exception):
+        lp.load_tables(specs, workers=4)
+    assert len(_silver(pg_engine)) == 4
+    loaded = pd.read_sql("SELECT path FROM weather.load_manifest", pg_engine)
+    assert sorted(loaded["path"]) == [
+        os.path.join("silver", f"month={m}", "weather.parquet")
+        for m in ["2025-01", "2025-02"]
+    ]
+
+    os.remove(bad_dir / "weather.parquet")
+    report = lp.load_tables(specs, workers=4)
+    assert report["weather_silver"]["files"] == 0  # nothing new
+    assert set(report) == {s["table_name"] for s in specs}
+
+
+def test_load_tables_on_sqlite_stand_in(tmp_path, monkeypatch):
+    # Insert path + manifest through the dialect-aware upsert
+    engine = lp.sqlite_engine(str(tmp_path))
+    monkeypatch.setattr(lp, "engine", engine)
+    monkeypatch.setattr(lp, "DATA_DIR", str(tmp_path))
+    _write_silver(str(tmp_path), "2025-01-12", 30.0)
+    specs = lp.table_specs(compacted=False)
+
+    report = lp.load_tables(specs, workers=1)
+    assert report["weather_silver"]["rows"] == 3
+    assert _silver(engine)["temp_max"].tolist() == [30.0, 31.0, 32.0]
+    assert lp.load_tables(specs, workers=1)["weather_silver"]["files"] == 0
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_partitioned(pg_engine):
+    init_sql = os.path.join(
+        os.path.dirname(__file__), "..", "sql", "init_partitioned.sql"
+    )
+    with pg_engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS weather CASCADE"))
+        conn.connection.cursor().execute(open(init_sql).read())
+    return pg_engine
+
+
+def _partitions(engine, table):
+    return pd.read_sql(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        f"WHERE i.inhparent = 'weather.{table}'::regclass ORDER BY 1",
+        engine,
+    )["relname"].tolist()
+
+
+@pytest.mark.parametrize("method", ["copy", "insert"])
+def test_partitioned_schema_routes_rows_and_refreshes_rollup(
+    pg_partitioned, tmp_path, method
+):
+    out_dir = tmp_path / "gold" / "2025-02-03"
+    out_dir.mkdir(parents=True)
+    pd.DataFrame(
+        {
+            "run_date": "2025-02-03",
+            "city_code": ["BUE", "BUE", "MAD", "BUE"],
+            "date": pd.to_datetime(
+                ["2025-01-30", "2025-01-31", "2025-01-31", "2025-02-01"]
+            ).date,
+            "temp_min": [10.0, 12.0, 5.0, 14.0],
+            "temp_max": [20.0, 30.0, 15.0, 40.0],
+            "precip_mm": [1.0, 0.0, 2.5, 0.5],
+        }
+    ).to_parquet(out_dir / "weather_daily_enriched.parquet", index=False)
+
+    spec = next(s for s in lp.table_specs(False) if s["table_name"] == "weather_daily")
+    report = lp.load_tables([spec], method=method)
+    assert report["weather_daily"]["rows"] == 4
+    assert _partitions(pg_partitioned, "weather_daily") == [
+        "weather_daily_p2025_01",
+        "weather_daily_p2025_02",
+    ]
+
+    rollup = pd.read_sql(
+        "SELECT city_code, month, days, avg_temp_max, total_precip "
+        "FROM weather.weather_daily_monthly_rollup ORDER BY month, city_code",
+        pg_partitioned,
+    )
+    assert rollup["days"].tolist() == [2, 1, 1]
+    assert rollup["avg_temp_max"].tolist() == [25.0, 15.0, 40.0]
+
+    # In-memory frames take the same path: new month → new partition + rollup row
+    frame = pd.DataFrame(
+        {
+            "run_date": "2025-03-02",
+            "city_code": ["MAD"],
+            "date": pd.to_datetime(["2025-03-01"]),
+            "temp_max": [18.0],
+        }
+    )
+    lp.load_frame(frame, "weather_daily", spec["columns"], spec["conflict_keys"])
+    assert "weather_daily_p2025_03" in _partitions(pg_partitioned, "weather_daily")
+    months = pd.read_sql(
+        "SELECT month FROM weather.weather_daily_monthly_rollup", pg_partitioned
+    )["month"]
+    assert len(months) == 4
+
+    # A later GOLD file repeats every day (DO NOTHING: none inserted) plus a new one:
+    # only the new day's month is refreshed, the others keep their rollup rows
+    with pg_partitioned.begin() as conn:
+        conn.execute(text("UPDATE weather.weather_daily_monthly_rollup SET days = -1"))
+    out_dir = tmp_path / "gold" / "2025-04-03"
+    out_dir.mkdir(parents=True)
+    pd.DataFrame(
+        {
+            "run_date": "2025-04-03",
+            "city_code": ["BUE", "BUE", "MAD", "BUE", "MAD", "BUE"],
+            "date": pd.to_datetime(
+                [
+                    "2025-01-30",
+                    "2025-01-31",
+                    "2025-01-31",
+                    "2025-02-01",
+                    "2025-03-01",
+                    "2025-04-01",
+                ]
+            ).date,
+            "temp_max": [20.0, 30.0, 15.0, 40.0, 18.0, 22.0],
+        }
+    ).to_parquet(out_dir / "weather_daily_enriched.parquet", index=False)
+    assert lp.load_tables([spec], method=method)["weather_daily"]["files"] == 1
+    rollup = pd.read_sql(
+        "SELECT month, days FROM weather.weather_daily_monthly_rollup "
+        "ORDER BY month, city_code",
+        pg_partitioned,
+    )
+    assert rollup["days"].tolist() == [-1, -1, -1, -1, 1]
+
+
+def test_month_spans_merges_consecutive_months():
+    d = datetime.date
+    assert lp._month_spans([None]) == []
+    assert lp._month_spans(
+        [
+            (d(2025, 3, 5), d(2025, 3, 9)),
+            (d(2024, 1, 31), d(2024, 2, 1)),
+            None,
+            (d(2025, 1, 2), d(2025, 2, 28)),
+        ]
+    ) == [(d(2024, 1, 1), d(2024, 2, 1)), (d(2025, 1, 1), d(2025, 3, 1))]
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from pipeline import metrics
+
+
+def test_track_records_and_flushes_per_stage(tmp_path):
+    with metrics.track("gold", rows_in=10) as rec:
+        with metrics.track("gold.rolling") as step:
+            sum(range(10000))
+            step["rows_out"] = 5
+        rec["rows_out"] = 5
+    with pytest.raises(ValueError):
+        with metrics.track("golden"):
+            raise ValueError("boom")
+
+    path = metrics.write_metrics(str(tmp_path), "2025-01-01", "gold")
+    with open(path) as f:
+        doc = json.load(f)
+    assert doc["stage"] == "gold"
+    # Sub-steps finish first; "golden" is not a sub-step of "gold"
+    assert [r["name"] for r in doc["records"]] == ["gold.rolling", "gold"]
+    for r in doc["records"]:
+        assert r["wall_s"] >= 0 and r["cpu_s"] >= 0
+        assert {"rss_mb", "peak_rss_mb", "started_at"} <= set(r)
+    assert doc["records"][1]["rows_in"] == 10
+
+    # Flushed records are gone, the failed one is kept with its error
+    assert metrics.records("gold") == []
+    (failed,) = metrics.records("golden")
+    assert "boom" in failed["error"]
+    metrics.write_metrics(str(tmp_path), "2025-01-01", "golden")
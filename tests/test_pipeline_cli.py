@@ -0,0 +1,82 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+from pipeline.__main__ import STAGE_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["numpy", "pandas", "pyarrow", "sqlalchemy", "requests", "dotenv"]
+# Cumulative import time of the dispatcher (python -X importtime), in µs:
+# a few ms in practice, the budget leaves room for slow CI machines
+CLI_IMPORT_BUDGET_US = 100_000
+
+
+def _python(*args, env=None):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, **(env or {})},
+        check=True,
+    )
+
+
+def _imported_after(statement):
+    out = _python("-c", f"import sys; {statement}; print(' '.join(sys.modules))")
+    return set(out.stdout.split()) & set(HEAVY)
+
+
+def test_cli_import_budget():
+    out = _python("-X", "importtime", "-c", "import pipeline.__main__")
+    line = next(
+        ln
+        for ln in out.stderr.splitlines()
+        if ln.rstrip().endswith("pipeline.__main__")
+    )
+    assert int(line.split("|")[1]) < CLI_IMPORT_BUDGET_US
+    assert _imported_after("import pipeline.__main__") == set()
+    assert "usage: python -m pipeline" in _python("-m", "pipeline", "--help").stdout
+
+
+@pytest.mark.parametrize(
+    "module, allowed",
+    [
+        ("ingestion.fetch_weather", {"requests"}),
+        ("pipeline.runner", {"numpy", "pandas", "pyarrow"}),
+        ("loaders.load_to_pg", {"numpy", "pandas", "pyarrow", "sqlalchemy"}),
+    ],
+)
+def test_stage_imports_stay_lazy(module, allowed):
+    # requests / SQLAlchemy only where used
+    assert _imported_after(f"import {module}") <= allowed
+
+
+def test_loader_engine_is_deferred():
+    # Neither .env nor the DB driver at import; get_engine creates it
+    out = _python("-c", "import loaders.load_to_pg as lp; print(lp.engine)")
+    assert out.stdout.strip() == "None"
+
+
+@pytest.mark.parametrize(
+    "script",
+    [
+        "ingestion/fetch_weather.py",
+        "transformations/clean_weather.py",
+        "models/gold_weather.py",
+        "loaders/load_to_pg.py",
+    ],
+)
+def test_stage_scripts_run_directly(script):
+    # The original per-script entry points keep working next to python -m
+    assert "usage:" in _python(script, "--help").stdout
+
+
+def test_cli_runs_stage_module(tmp_path):
+    assert all(importlib.util.find_spec(m) for m in STAGE_MODULES.values())
+    out = _python("-m", "pipeline", "compact", env={"DATA_DIR": str(tmp_path)})
+    assert "No clean (silver) files found" in out.stderr
+    assert (tmp_path / "metrics").is_dir()
@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingestion.raw_store import RawWriter
+from models import gold_weather as gw
+from pipeline.runner import run_pipeline
+
+
+def _write_raw(data_dir, run_date, start, days, seed):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days).strftime("%Y-%m-%d").tolist()
+    with RawWriter(data_dir, run_date) as writer:
+        for code in ["BUE", "MAD", "SCL"]:
+            tmax = rng.normal(25, 5, days).round(1)
+            writer.write(
+                {
+                    "_city_code": code,
+                    "daily": {
+                        "time": dates,
+                        "temperature_2m_max": tmax.tolist(),
+                        "temperature_2m_min": (tmax - 8).tolist(),
+                        "precipitation_sum": rng.gamma(1, 2, days).round(1).tolist(),
+                    },
+                }
+            )
+
+
+@pytest.fixture
+def raw_history(tmp_path, monkeypatch):
+    data_dir = str(tmp_path)
+    monkeypatch.setenv("DATA_DIR", data_dir)
+    monkeypatch.setattr(gw, "DATA_DIR", data_dir)
+    _write_raw(data_dir, "2025-03-01", "2024-02-01", 394, seed=1)
+    _write_raw(data_dir, "2025-03-02", "2025-01-31", 30, seed=2)
+    return data_dir
+
+
+def test_run_pipeline_in_memory_matches_file_build(raw_history):
+    # History partition through the regular scripts
+    run_pipeline("2025-03-01", stages=["clean"])
+    assert os.path.exists(os.path.join(raw_history, "clean", "2025-03-01"))
+
+    # Today: clean → gold in memory, nothing written
+    out = run_pipeline("2025-03-02", stages=["clean", "gold"], persist=False)
+    assert not os.path.exists(os.path.join(raw_history, "clean", "2025-03-02"))
+    assert not os.path.exists(os.path.join(raw_history, "gold"))
+
+    # Same run persisted, then GOLD rebuilt from the files
+    run_pipeline("2025-03-02", stages=["clean", "gold"])
+    with open(os.path.join(raw_history, "metrics", "2025-03-02", "gold.json")) as f:
+        steps = [r["name"] for r in json.load(f)["records"]]
+    assert {"gold", "gold.rolling", "gold.prior_period", "gold.persist"} <= set(steps)
+    expected_dir = gw.build_gold("expected")
+    for name, frame in out["gold"].items():
+        expected = pd.read_parquet(os.path.join(expected_dir, name))
+        expected["run_date"] = "2025-03-02"
+        got = pd.read_parquet(os.path.join(raw_history, "gold", "2025-03-02", name))
+        for df in (expected, got, frame):
+            df["city_code"] = df["city_code"].astype(str)
+        pd.testing.assert_frame_equal(got, expected)
+        pd.testing.assert_frame_equal(
+            frame.reset_index(drop=True), expected, check_dtype=False
+        )
+
+
+def test_run_pipeline_rejects_unknown_stage():
+    with pytest.raises(ValueError):
+        run_pipeline(stages=["fetch", "transform"])
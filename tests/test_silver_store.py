@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+
+from transformations.clean_weather import flatten_city_blobs
+from transformations.silver_store import missing_columns, read_silver, silver_dataset
+
+
+def _write_clean(data_dir, run_date, cities, dates, as_str=False):
+    blobs = [
+        {
+            "_city_code": code,
+            "daily": {
+                "time": dates,
+                "temperature_2m_max": [30.0] * len(dates),
+                "temperature_2m_min": [20.0] * len(dates),
+                "precipitation_sum": [1.0] * len(dates),
+            },
+        }
+        for code in cities
+    ]
+    df = flatten_city_blobs(blobs, run_date)
+    if as_str:  # partitions written before city_code became categorical
+        df["city_code"] = df["city_code"].astype(str)
+    out_dir = os.path.join(data_dir, "clean", run_date)
+    os.makedirs(out_dir, exist_ok=True)
+    df.to_parquet(os.path.join(out_dir, "weather.parquet"), index=False)
+
+
+def test_read_silver_pruning_and_pushdown(tmp_path):
+    data_dir = str(tmp_path)
+    _write_clean(data_dir, "2025-01-03", ["SCL", "BUE"], ["2025-01-01", "2025-01-02"])
+    _write_clean(data_dir, "2025-01-04", ["MAD"], ["2025-01-02", "2025-01-03"], True)
+
+    df = read_silver(data_dir, columns=["city_code", "date", "temp_max"])
+    assert list(df.columns) == ["city_code", "date", "temp_max"]
+    assert len(df) == 6
+    # Categories sorted regardless of file / dictionary order
+    assert list(df["city_code"].cat.categories) == ["BUE", "MAD", "SCL"]
+
+    df = read_silver(
+        data_dir,
+        columns=["run_date", "city_code", "date"],
+        start="2025-01-02",
+        cities=["MAD", "BUE"],
+    )
+    assert sorted(zip(df["city_code"], df["date"].dt.day)) == [
+        ("BUE", 2),
+        ("MAD", 2),
+        ("MAD", 3),
+    ]
+
+    # run_date comes from the partition folder
+    df = read_silver(data_dir, run_dates=["2025-01-04"])
+    assert set(df["run_date"]) == {"2025-01-04"} and len(df) == 2
+
+
+def test_missing_columns(tmp_path):
+    data_dir = str(tmp_path)
+    _write_clean(data_dir, "2025-01-03", ["BUE"], ["2025-01-01"])
+    bad_dir = os.path.join(data_dir, "clean", "2025-01-04")
+    os.makedirs(bad_dir)
+    pd.DataFrame(
+        {"city_code": ["BUE"], "date": [pd.Timestamp("2025-01-02")]}
+    ).to_parquet(os.path.join(bad_dir, "weather.parquet"))
+    assert missing_columns(silver_dataset(data_dir), ["city_code", "temp_max"]) == {
+        "temp_max"
+    }
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from transformations.clean_weather import write_clean
+from transformations.silver_store import read_silver
+from transformations.storage import read_compact, write_compact
+
+
+def _clean_frame(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    tmax = np.round(rng.uniform(-20, 45, n), 1)
+    tmin = np.round(tmax - rng.uniform(0, 15, n), 1)
+    tmax[::17] = np.nan
+    return pd.DataFrame(
+        {
+            "run_date": "2025-03-01",
+            "city_code": pd.Categorical(rng.choice(["BUE", "MAD", "SCL"], n)),
+            "date": pd.date_range("2024-01-01", periods=n, freq="D"),
+            "temp_max": tmax,
+            "temp_min": tmin,
+            "precip_mm": np.round(rng.gamma(0.6, 4.0, n), 1),
+            "temp_avg": (tmax + tmin) / 2,
+            "temp_range": tmax - tmin,
+        }
+    )
+
+
+def test_compact_schema_on_disk(tmp_path):
+    path = str(tmp_path / "weather.parquet")
+    write_compact(_clean_frame(), path)
+
+    schema = pq.read_schema(path)
+    assert schema.field("city_code").type == pa.dictionary(pa.int32(), pa.string())
+    assert schema.field("date").type == pa.date32()
+    assert schema.field("temp_max").type == pa.float32()
+    assert schema.field("run_date").type == pa.string()
+    assert pq.ParquetFile(path).metadata.row_group(0).column(3).compression == "ZSTD"
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_silver_round_trip_is_exact(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    df = _clean_frame()
+    write_clean(df, "2025-03-01")
+
+    got = read_silver(str(tmp_path)).sort_values("date", ignore_index=True)
+    for col in ["temp_max", "temp_min", "precip_mm", "temp_avg", "temp_range"]:
+        # Same float64 bits as the frame clean_weather computed
+        np.testing.assert_array_equal(got[col].to_numpy(), df[col].to_numpy())
+    assert got["date"].dtype == "datetime64[ns]"
+
+    one = read_compact(str(tmp_path / "clean" / "2025-03-01" / "weather.parquet"))
+    np.testing.assert_array_equal(one["temp_min"].to_numpy(), df["temp_min"])
+    assert (one["date"] == df["date"]).all()
@@ -0,0 +1,139 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from ingestion.raw_store import RawWriter
+from pipeline.runner import run_pipeline
+from transformations.clean_weather import flatten_city_blobs, write_clean
+from transformations.validate_weather import (
+    RULES,
+    quarantine_path,
+    validate_all,
+    validate_frame,
+    validate_weather,
+)
+
+RUN_DATE = "2025-03-01"
+
+
+# Row by row: ok, tmin > tmax, negative precip, 75 °C, bad date,
+# missing metric (ok), ok, repeat of the first city-date, ok
+DAILY = {
+    "time": [
+        "2025-02-01",
+        "2025-02-02",
+        "2025-02-03",
+        "2025-02-04",
+        "not-a-date",
+        "2025-02-05",
+        "2025-02-06",
+        "2025-02-01",
+        "2025-02-07",
+    ],
+    "temperature_2m_max": [30.0, 18.0, 28.0, 75.0, 25.0, None, 26.0, 31.0, 27.0],
+    "temperature_2m_min": [20.0, 21.0, 17.0, 20.0, 15.0, 16.0, 15.0, 21.0, 16.0],
+    "precipitation_sum": [0.0, 1.0, -2.5, 0.0, 0.0, 3.0, 0.0, 0.0, 0.0],
+}
+
+
+def _clean_frame():
+    return flatten_city_blobs([{"_city_code": "BUE", "daily": DAILY}], RUN_DATE)
+
+
+def test_validate_weather_quarantines_failing_rows(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    out = write_clean(_clean_frame(), RUN_DATE)
+
+    summary = validate_weather(RUN_DATE)
+    assert summary["rules"] == {
+        "key_missing": 1,
+        "temp_min_gt_max": 1,
+        "temp_out_of_range": 1,
+        "precip_negative": 1,
+        "precip_out_of_range": 0,
+        "duplicate_key": 1,
+    }
+    assert summary["quarantined"] == 5
+
+    clean = pd.read_parquet(out)
+    assert clean["date"].astype(str).tolist() == [
+        "2025-02-01",
+        "2025-02-05",
+        "2025-02-06",
+        "2025-02-07",
+    ]
+    quarantine = pq.read_table(quarantine_path(str(tmp_path), RUN_DATE)).to_pandas()
+    assert set(quarantine["rule_id"]) <= set(RULES)
+    assert quarantine.set_index("row")["rule_id"].to_dict() == {
+        1: "temp_min_gt_max",
+        2: "precip_negative",
+        3: "temp_out_of_range",
+        4: "key_missing",
+        7: "duplicate_key",
+    }
+    assert quarantine.loc[quarantine["row"] == 2, "precip_mm"].item() == -2.5
+    # The CSV sample follows the rewritten partition
+    sample = pd.read_csv(os.path.join(os.path.dirname(out), "weather_sample.csv"))
+    assert sample["date"].tolist() == clean["date"].astype(str).tolist()
+    assert sample["temp_min"].tolist() == clean["temp_min"].tolist()
+
+    # Already validated: skipped, files untouched
+    assert validate_weather(RUN_DATE)["status"] == "skipped"
+    assert len(pd.read_parquet(out)) == 4
+
+
+def test_validate_frame_matches_file_validation(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    rng = np.random.default_rng(0)
+    df = _clean_frame().sample(frac=1, random_state=1, ignore_index=True)
+    df.loc[rng.choice(len(df), 2, replace=False), "temp_min"] = np.nan
+
+    valid, quarantine, counts = validate_frame(df)
+    out = write_clean(df, RUN_DATE)
+    summary = validate_weather(RUN_DATE)
+
+    assert counts == summary["rules"]
+    on_disk = pd.read_parquet(out)
+    assert (on_disk["date"] == valid["date"]).all()
+    assert quarantine.equals(pq.read_table(quarantine_path(str(tmp_path), RUN_DATE)))
+
+
+def test_runner_validates_in_memory(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    with RawWriter(str(tmp_path), RUN_DATE) as writer:
+        writer.write({"_city_code": "BUE", "daily": DAILY})
+
+    out = run_pipeline(RUN_DATE, stages=["clean", "validate"])
+    assert len(out["clean"]) == 4
+    on_disk = pd.read_parquet(
+        os.path.join(tmp_path, "clean", RUN_DATE, "weather.parquet")
+    )
+    assert (on_disk["date"] == out["clean"]["date"]).all()
+    # Written after the CLEAN partition: the file stage sees it as validated
+    assert validate_weather(RUN_DATE)["status"] == "skipped"
+
+
+def test_validate_weather_missing_partition(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    write_clean(_clean_frame(), RUN_DATE)
+    assert validate_weather("2025-03-02")["status"] == "missing"
+    assert not os.path.exists(quarantine_path(str(tmp_path), "2025-03-02"))
+
+
+def test_validate_all_skips_empty_partitions(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    # 0-row partition without columns, as older clean runs wrote for an empty RAW day
+    empty = tmp_path / "clean" / "2025-02-28"
+    empty.mkdir(parents=True)
+    pd.DataFrame([]).to_parquet(empty / "weather.parquet")
+    write_clean(_clean_frame(), RUN_DATE)
+    # Unreadable partition: logged, the next ones are still checked
+    broken = tmp_path / "clean" / "2025-02-27"
+    broken.mkdir()
+    (broken / "weather.parquet").write_bytes(b"not parquet")
+
+    summaries = validate_all()
+    assert [s["status"] for s in summaries] == ["error", "empty", "validated"]
+    assert summaries[2]["quarantined"] == 5
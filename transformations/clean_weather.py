@@ -1,14 +1,33 @@
+import argparse
 import glob
-import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import logging
 
+if not __package__:
+    # Run as a script (python transformations/clean_weather.py): make the project root
+    # importable for the package imports below
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingestion.raw_store import iter_city_blobs, raw_path as _raw_path
+from pipeline.metrics import file_bytes, track, write_metrics
+from transformations.storage import write_compact
+
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
+CLEAN_WORKERS = int(os.getenv("CLEAN_WORKERS", str(os.cpu_count() or 1)))
+# Rows in the weather_sample.csv written next to each CLEAN parquet
+SAMPLE_ROWS = 200
+
 
 def _latest_run_date(base_dir: str) -> str:
     parts = sorted(glob.glob(os.path.join(base_dir, "raw", "*")))
@@ -17,6 +36,62 @@ def _latest_run_date(base_dir: str) -> str:
     return os.path.basename(parts[-1])
 
 
+def flatten_city_blobs(blobs: Iterable[dict], run_date: str) -> pd.DataFrame:
+    """
+    Flatten city payloads into one row per city-date, column by column.
+    Each city's daily arrays go straight into NumPy arrays (truncated to the
+    shortest one, like zip) and are concatenated once at the end.
+    """
+    codes: list[str | None] = []
+    lengths: list[int] = []
+    dates: list[np.ndarray] = []
+    tmax: list[np.ndarray] = []
+    tmin: list[np.ndarray] = []
+    prcp: list[np.ndarray] = []
+    for city_blob in blobs:
+        daily = city_blob.get("daily", {})
+        arrays = [
+            daily.get("time", []),
+            daily.get("temperature_2m_max", []),
+            daily.get("temperature_2m_min", []),
+            daily.get("precipitation_sum", []),
+        ]
+        n = min(len(a) for a in arrays)
+        codes.append(city_blob.get("_city_code"))
+        lengths.append(n)
+        dates.append(np.asarray(arrays[0][:n], dtype=object))
+        # None → NaN
+        tmax.append(np.asarray(arrays[1][:n], dtype="float64"))
+        tmin.append(np.asarray(arrays[2][:n], dtype="float64"))
+        prcp.append(np.asarray(arrays[3][:n], dtype="float64"))
+    logger.info(f"Read RAW with {len(codes)} cities")
+
+    def _concat(parts: list[np.ndarray], dtype: str) -> np.ndarray:
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    # city_code as a categorical: one small int code per row instead of a string
+    city_idx, categories = pd.factorize(pd.Series(codes, dtype=object), sort=True)
+    city_code = pd.Categorical.from_codes(
+        np.repeat(city_idx, lengths), categories=categories
+    )
+    temp_max = _concat(tmax, "float64")
+    temp_min = _concat(tmin, "float64")
+    df = pd.DataFrame(
+        {
+            "run_date": run_date,
+            "city_code": city_code,
+            "date": pd.to_datetime(_concat(dates, "object"), errors="coerce"),
+            "temp_max": temp_max,
+            "temp_min": temp_min,
+            "precip_mm": _concat(prcp, "float64"),
+            # Derived metrics
+            "temp_avg": (temp_max + temp_min) / 2,
+            "temp_range": temp_max - temp_min,
+        }
+    )
+    return df
+
+
 def clean_weather(run_date: str | None = None) -> str:
     BASE_DIR = os.getenv("DATA_DIR", "./data")
     logger.info("Starting clean_weather()")
@@ -24,58 +99,134 @@ def clean_weather(run_date: str | None = None) -> str:
 
     """Read RAW Open-Meteo data and create a tidy table: one row per city-date."""
     run_date = run_date or _latest_run_date(BASE_DIR)
-    raw_path = os.path.join(BASE_DIR, "raw", run_date, "weather.json")
-    logger.info(f"Loading RAW JSON from {raw_path}")
-
-    # Load the JSON payload
-    with open(raw_path, "r") as f:
-        payload = json.load(f)
-    logger.info(f"Loaded RAW JSON with {len(payload.get('data', []))} cities")
-
-    rows = []
-    # Flatten JSON: each city blob contains daily weather arrays
-    for city_blob in payload.get("data", []):
-        city = city_blob.get("_city_code")
-        daily = city_blob.get("daily", {})
-        dates = daily.get("time", [])
-        tmax = daily.get("temperature_2m_max", [])
-        tmin = daily.get("temperature_2m_min", [])
-        prcp = daily.get("precipitation_sum", [])
-        # Build one record per date
-        for d, mx, mn, pc in zip(dates, tmax, tmin, prcp):
-            rows.append(
-                {
-                    "run_date": run_date,
-                    "city_code": city,
-                    "date": d,
-                    "temp_max": mx,
-                    "temp_min": mn,
-                    "precip_mm": pc,
-                }
-            )
-
-    df = pd.DataFrame(rows)
-    logger.info(f"Clean dataframe shape: {df.shape}")
-
-    # Compute derived metrics
-    if not df.empty:
-        df["date"] = pd.to_datetime(df["date"], errors="coerce")
-        df["temp_avg"] = (df["temp_max"] + df["temp_min"]) / 2
-        df["temp_range"] = df["temp_max"] - df["temp_min"]
-
-    # Save clean (silver zone)
+    raw_path = _raw_path(BASE_DIR, run_date)
+    logger.info(f"Streaming RAW from {raw_path}")
+
+    with track("clean", bytes_read=file_bytes(raw_path)) as rec:
+        with track("clean.flatten") as step:
+            df = flatten_city_blobs(iter_city_blobs(raw_path), run_date)
+            step["rows_out"] = len(df)
+        logger.info(f"Clean dataframe shape: {df.shape}")
+        with track("clean.write", rows_in=len(df)) as step:
+            out_parquet = write_clean(df, run_date)
+            step["bytes_written"] = file_bytes(out_parquet)
+        rec.update(rows_out=len(df), bytes_written=step["bytes_written"])
+    write_metrics(BASE_DIR, run_date, "clean")
+    return out_parquet
+
+
+def write_sample(df: pd.DataFrame, out_dir: str) -> None:
+    # Export a CSV sample for quick inspection (this is just to check the data and analyze columns)
+    df.head(SAMPLE_ROWS).to_csv(
+        os.path.join(out_dir, "weather_sample.csv"), index=False
+    )
+
+
+def write_clean(df: pd.DataFrame, run_date: str) -> str:
+    """Save a CLEAN frame as data/clean/<run_date>/weather.parquet (+ CSV sample)."""
+    BASE_DIR = os.getenv("DATA_DIR", "./data")
     out_dir = os.path.join(BASE_DIR, "clean", run_date)
     os.makedirs(out_dir, exist_ok=True)
     out_parquet = os.path.join(out_dir, "weather.parquet")
     logger.info(f"Saving CLEAN parquet to {out_parquet}")
-    df.to_parquet(out_parquet, index=False)
+    write_compact(df, out_parquet)
 
-    # Export a CSV sample for quick inspection (this is just to check the data and analyze columns)
-    df.head(200).to_csv(os.path.join(out_dir, "weather_sample.csv"), index=False)
+    write_sample(df, out_dir)
 
     logger.info(f"CLEAN saved OK: {out_parquet} rows={len(df)}")
     return out_parquet
 
 
+# --------------------
+# Backfill: rebuild many RAW partitions in parallel
+# --------------------
+
+
+def _raw_partitions(
+    base_dir: str, start: str | None = None, end: str | None = None
+) -> list[str]:
+    """run_dates under raw/, optionally limited to [start, end] (ISO dates, inclusive)."""
+    parts = sorted(
+        os.path.basename(p) for p in glob.glob(os.path.join(base_dir, "raw", "*"))
+    )
+    return [
+        p for p in parts if (start is None or p >= start) and (end is None or p <= end)
+    ]
+
+
+def _is_up_to_date(base_dir: str, run_date: str) -> bool:
+    """True when the CLEAN parquet is newer than its RAW input."""
+    out = os.path.join(base_dir, "clean", run_date, "weather.parquet")
+    if not os.path.exists(out):
+        return False
+    return os.path.getmtime(out) >= os.path.getmtime(_raw_path(base_dir, run_date))
+
+
+def _clean_partition(run_date: str) -> tuple[str, int, float]:
+    # Worker entry point (module-level so it can be pickled by the process pool)
+    t0 = time.perf_counter()
+    out = clean_weather(run_date)
+    rows = pq.ParquetFile(out).metadata.num_rows
+    return run_date, rows, time.perf_counter() - t0
+
+
+def backfill_clean(
+    start: str | None = None,
+    end: str | None = None,
+    workers: int = CLEAN_WORKERS,
+    force: bool = False,
+) -> list[dict]:
+    """
+    Clean every RAW partition (or those in [start, end]) across a process pool.
+    Partitions whose CLEAN parquet is newer than the RAW input are skipped unless force=True.
+    Returns one summary dict per partition: run_date, status, rows, seconds.
+    """
+    BASE_DIR = os.getenv("DATA_DIR", "./data")
+    run_dates = _raw_partitions(BASE_DIR, start, end)
+    todo = [rd for rd in run_dates if force or not _is_up_to_date(BASE_DIR, rd)]
+    logger.info(
+        f"Backfill: {len(run_dates)} RAW partitions, {len(todo)} to clean, "
+        f"{len(run_dates) - len(todo)} up to date (workers={workers})"
+    )
+
+    summary: dict[str, dict[str, Any]] = {
+        rd: {"run_date": rd, "status": "skipped", "rows": None, "seconds": 0.0}
+        for rd in run_dates
+    }
+    t0 = time.perf_counter()
+    if todo:
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+            for rd, rows, secs in pool.map(_clean_partition, todo):
+                summary[rd].update(status="cleaned", rows=rows, seconds=secs)
+    elapsed = time.perf_counter() - t0
+
+    results = [summary[rd] for rd in run_dates]
+    for r in results:
+        n = "-" if r["rows"] is None else r["rows"]
+        logger.info(
+            f"  {r['run_date']}  {r['status']:<8} rows={n:<8} {r['seconds']:.2f}s"
+        )
+    total_rows = sum(r["rows"] or 0 for r in results)
+    logger.info(
+        f"Backfill finished: {len(todo)} partitions, {total_rows} rows in {elapsed:.2f}s"
+    )
+    return results
+
+
 if __name__ == "__main__":
-    clean_weather()
+    parser = argparse.ArgumentParser(description="Build CLEAN (silver) partitions")
+    parser.add_argument("--run-date", help="RAW partition to clean (default: latest)")
+    parser.add_argument(
+        "--backfill", action="store_true", help="Clean all RAW partitions in parallel"
+    )
+    parser.add_argument("--start", help="Backfill: first run_date (inclusive)")
+    parser.add_argument("--end", help="Backfill: last run_date (inclusive)")
+    parser.add_argument("--workers", type=int, default=CLEAN_WORKERS)
+    parser.add_argument(
+        "--force", action="store_true", help="Backfill: also rebuild up-to-date ones"
+    )
+    args = parser.parse_args()
+    if args.backfill:
+        backfill_clean(args.start, args.end, workers=args.workers, force=args.force)
+    else:
+        clean_weather(args.run_date)
@@ -0,0 +1,189 @@
+import argparse
+import datetime
+import json
+import os
+import logging
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+from pipeline.metrics import file_bytes, track, write_metrics
+from transformations.silver_store import (
+    SILVER_SCHEMA,
+    SILVER_STORE,
+    read_silver,
+    silver_dataset,
+    silver_paths,
+    store_paths,
+)
+from transformations.storage import read_compact, write_compact
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+KEYS = ["city_code", "date"]
+
+
+def _store_dir(base_dir: str) -> str:
+    return os.path.join(base_dir, SILVER_STORE)
+
+
+def _state_path(base_dir: str) -> str:
+    return os.path.join(_store_dir(base_dir), "_compaction_state.json")
+
+
+def _month_path(base_dir: str, month: str) -> str:
+    return os.path.join(_store_dir(base_dir), f"month={month}", "weather.parquet")
+
+
+def _dedup_last_run(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per (city_code, date): the row from the latest run_date wins."""
+    df = df.sort_values("run_date", kind="stable")
+    df = df.drop_duplicates(subset=KEYS, keep="last")
+    return df.sort_values(KEYS, ignore_index=True)
+
+
+def _write_month(base_dir: str, month: str, df: pd.DataFrame) -> None:
+    path = _month_path(base_dir, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Sorted by city → row-group statistics let city filters skip row groups
+    write_compact(df[SILVER_SCHEMA.names], path)
+
+
+def _run_dates(paths: list[str]) -> list[str]:
+    return [os.path.basename(os.path.dirname(p)) for p in paths]
+
+
+def _months_with_runs(base_dir: str, run_dates: list[str]) -> set[str]:
+    """Months of the store holding rows of these runs (run_date column scan)."""
+    paths = store_paths(base_dir)
+    if not run_dates or not paths:
+        return set()
+    dataset = ds.dataset(paths, format="parquet", schema=SILVER_SCHEMA)
+    dates = dataset.to_table(
+        columns=["date"], filter=ds.field("run_date").isin(run_dates)
+    ).column(0)
+    return set(pd.Series(dates.to_numpy()).dt.strftime("%Y-%m").dropna())
+
+
+def _save_state(base_dir: str, state: dict) -> None:
+    os.makedirs(_store_dir(base_dir), exist_ok=True)
+    with open(_state_path(base_dir) + ".tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(_state_path(base_dir) + ".tmp", _state_path(base_dir))
+
+
+def compact_silver(full: bool = False) -> dict:
+    """
+    Merge the daily CLEAN partitions into the compacted SILVER store:
+    data/silver/month=<YYYY-MM>/weather.parquet with one row per (city_code, date),
+    last run_date wins.
+    - Incremental by default: only CLEAN partitions new or rewritten since the
+      last compaction are read, and only the months they touch are rewritten.
+      A rewritten partition replaces its run's rows in every month they cover.
+    - Removing CLEAN partitions keeps their rows in the store; only full=True
+      rebuilds it from the partitions on disk.
+    """
+    BASE_DIR = os.getenv("DATA_DIR", "./data")
+    logger.info("Starting compact_silver()")
+    with track("compact") as rec:
+        summary = _compact(BASE_DIR, full, rec)
+        rec["rows_out"] = summary["rows"]
+    write_metrics(BASE_DIR, datetime.date.today().isoformat(), "compact")
+    return summary
+
+
+def _compact(BASE_DIR: str, full: bool, rec: dict) -> dict:
+    clean_paths = silver_paths(BASE_DIR)
+    if not clean_paths:
+        logger.warning("No clean (silver) files found.")
+        return {"partitions": 0, "months": 0, "rows": 0}
+
+    # The store is the source of truth: only --full rebuilds it from the CLEAN
+    # partitions on disk (without state, they are all merged into it)
+    state: dict = {}
+    if not full and os.path.exists(_state_path(BASE_DIR)):
+        with open(_state_path(BASE_DIR), "r") as f:
+            state = json.load(f)
+    if full:
+        for path in store_paths(BASE_DIR):
+            os.remove(path)
+    removed = set(state) - set(clean_paths)
+    if removed:
+        # Their rows stay in the store (storage grows with days, not runs)
+        logger.info(f"{len(removed)} CLEAN partitions removed, store rows kept")
+        for p in removed:
+            del state[p]
+
+    changed = [p for p in clean_paths if state.get(p) != os.path.getmtime(p)]
+    if not changed:
+        if removed:
+            _save_state(BASE_DIR, state)
+        logger.info("SILVER store is up to date")
+        return {"partitions": 0, "months": 0, "rows": 0}
+
+    rec["bytes_read"] = file_bytes(*changed)
+    run_dates = _run_dates(changed)
+    partitions = silver_dataset(BASE_DIR, source="partitions")
+    new = read_silver(BASE_DIR, run_dates=run_dates, dataset=partitions).dropna(
+        subset=["date"]
+    )
+    new["city_code"] = new["city_code"].astype(str)
+    new["month"] = new["date"].dt.strftime("%Y-%m")
+
+    # Rewritten runs (already compacted): their old rows are replaced in every
+    # month they cover, not only in the months of their new version
+    rewritten = _run_dates([p for p in changed if p in state])
+    redo = _months_with_runs(BASE_DIR, rewritten)
+
+    rows = 0
+    months = sorted(set(new["month"]) | redo)
+    for month in months:
+        merged = new[new["month"] == month].drop(columns="month")
+        path = _month_path(BASE_DIR, month)
+        if os.path.exists(path):
+            current = read_compact(path)
+            current["city_code"] = current["city_code"].astype(str)
+            if month in redo:
+                # Keys a rewritten run no longer has fall back to the other
+                # runs on disk (last run wins again below)
+                current = current[~current["run_date"].isin(rewritten)]
+                start = pd.Period(month, "M")
+                others = read_silver(
+                    BASE_DIR,
+                    start=start.start_time,
+                    end=start.end_time,
+                    run_dates=sorted(set(_run_dates(clean_paths)) - set(run_dates)),
+                    dataset=partitions,
+                ).dropna(subset=["date"])
+                others["city_code"] = others["city_code"].astype(str)
+                current = pd.concat([current, others], ignore_index=True)
+            merged = pd.concat([current, merged], ignore_index=True)
+        merged = _dedup_last_run(merged)
+        if merged.empty:
+            os.remove(path)
+            continue
+        _write_month(BASE_DIR, month, merged)
+        rows += len(merged)
+        logger.info(f"Compacted month={month}: {len(merged)} rows")
+
+    written = [_month_path(BASE_DIR, m) for m in months]
+    rec["bytes_written"] = file_bytes(*(p for p in written if os.path.exists(p)))
+    rec["rows_in"] = len(new)
+    state.update({p: os.path.getmtime(p) for p in changed})
+    _save_state(BASE_DIR, state)
+
+    logger.info(
+        f"SILVER store updated: {len(changed)} CLEAN partitions → "
+        f"{len(months)} months rewritten ({rows} rows)"
+    )
+    return {"partitions": len(changed), "months": len(months), "rows": rows}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact CLEAN partitions")
+    parser.add_argument("--full", action="store_true", help="Rebuild the store")
+    args = parser.parse_args()
+    compact_silver(full=args.full)
@@ -0,0 +1,162 @@
+import glob
+import os
+import logging
+from typing import Iterable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from transformations.storage import restore_metrics
+
+logger = logging.getLogger(__name__)
+
+# Logical SILVER schema. Files are stored compact (see transformations/storage.py);
+# those and files written by older runs (plain string city_code, float64 metrics,
+# empty partitions without columns) are cast to it on read.
+SILVER_SCHEMA = pa.schema(
+    [
+        ("run_date", pa.string()),
+        ("city_code", pa.dictionary(pa.int32(), pa.string())),
+        ("date", pa.timestamp("ns")),
+        ("temp_max", pa.float64()),
+        ("temp_min", pa.float64()),
+        ("precip_mm", pa.float64()),
+        ("temp_avg", pa.float64()),
+        ("temp_range", pa.float64()),
+    ]
+)
+# Metrics computed from temp_max / temp_min in clean_weather
+DERIVED_COLUMNS = {
+    "temp_avg": lambda df: (df["temp_max"] + df["temp_min"]) / 2,
+    "temp_range": lambda df: df["temp_max"] - df["temp_min"],
+}
+
+
+# Compacted store (see transformations/compact_silver.py):
+# data/silver/month=<YYYY-MM>/weather.parquet, one row per (city_code, date)
+SILVER_STORE = "silver"
+# "compacted" | "partitions" | "auto" (compacted store when it exists)
+SILVER_SOURCE = os.getenv("SILVER_SOURCE", "auto")
+
+
+def silver_paths(base_dir: str) -> list[str]:
+    """Daily CLEAN partitions (clean/<run_date>/weather.parquet)."""
+    return sorted(glob.glob(os.path.join(base_dir, "clean", "*", "weather.parquet")))
+
+
+def store_paths(base_dir: str) -> list[str]:
+    """Month files of the compacted SILVER store."""
+    return sorted(
+        glob.glob(os.path.join(base_dir, SILVER_STORE, "month=*", "weather.parquet"))
+    )
+
+
+def use_compacted(base_dir: str, source: str | None = None) -> bool:
+    source = source or SILVER_SOURCE
+    if source == "auto":
+        return bool(store_paths(base_dir))
+    return source == "compacted"
+
+
+def silver_dataset(base_dir: str, source: str | None = None) -> ds.Dataset:
+    """
+    SILVER as one pyarrow Dataset.
+    - Compacted store (deduplicated, last run wins) when `source` resolves to it.
+    - Otherwise all CLEAN partitions, with run_date taken from the
+      clean/<run_date>/ folder as a partition key (so run_date filters skip files).
+    """
+    if use_compacted(base_dir, source):
+        paths = store_paths(base_dir)
+        if not paths:
+            raise FileNotFoundError("Compacted SILVER store is empty.")
+        return ds.dataset(paths, format="parquet", schema=SILVER_SCHEMA)
+
+    paths = silver_paths(base_dir)
+    if not paths:
+        raise FileNotFoundError("No clean (silver) files found.")
+    return ds.dataset(
+        paths,
+        format="parquet",
+        schema=SILVER_SCHEMA,
+        partitioning=ds.DirectoryPartitioning(pa.schema([("run_date", pa.string())])),
+        partition_base_dir=os.path.join(base_dir, "clean"),
+    )
+
+
+def missing_columns(dataset: ds.Dataset, required: Iterable[str]) -> set[str]:
+    """Required columns absent from any non-empty SILVER file (footer reads only)."""
+    missing: set[str] = set()
+    for fragment in dataset.get_fragments():
+        if fragment.metadata.num_rows == 0:
+            continue
+        names = set(fragment.physical_schema.names) | {"run_date"}
+        missing |= set(required) - names
+    return missing
+
+
+def read_silver(
+    base_dir: str,
+    columns: list[str] | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    cities: Iterable[str] | None = None,
+    run_dates: Iterable[str] | None = None,
+    dataset: ds.Dataset | None = None,
+    low_memory: bool = False,
+) -> pd.DataFrame:
+    """
+    Read SILVER (compacted store or CLEAN partitions, see silver_dataset) as a single frame.
+    - Only `columns` are read (all by default).
+    - Date range [start, end], city and run_date filters are pushed down to the
+      scan, so row groups / files that cannot match are skipped.
+    - float32 metrics are restored to the float64 values clean_weather computed;
+      derived metrics are recomputed from temp_max / temp_min, bit for bit.
+    - low_memory=True scans one file / record batch at a time (no readahead), so
+      a filtered read holds little more than the rows it keeps.
+    """
+    dataset = dataset or silver_dataset(base_dir)
+    flt = None
+
+    def _and(expr):
+        nonlocal flt
+        flt = expr if flt is None else flt & expr
+
+    if start is not None:
+        _and(ds.field("date") >= pd.Timestamp(start))
+    if end is not None:
+        _and(ds.field("date") <= pd.Timestamp(end))
+    if cities is not None:
+        _and(ds.field("city_code").isin(list(cities)))
+    if run_dates is not None:
+        _and(ds.field("run_date").isin(list(run_dates)))
+
+    names = columns or SILVER_SCHEMA.names
+    derived = [c for c in DERIVED_COLUMNS if c in names]
+    scan = names
+    if derived:
+        scan = list(dict.fromkeys([*names, "temp_max", "temp_min"]))
+
+    readahead = {"fragment_readahead": 1, "batch_readahead": 1} if low_memory else {}
+    table = dataset.to_table(columns=scan, filter=flt, **readahead)
+    df = table.to_pandas()
+    metrics = [c for c in df.columns if c not in derived and df[c].dtype == "float64"]
+    restore_metrics(df, metrics)
+    for col in derived:
+        df[col] = DERIVED_COLUMNS[col](df)
+    df = df[list(names)]
+    if "city_code" in df.columns:
+        # Unified dictionaries come in first-seen order; keep categories sorted
+        cats = df["city_code"].cat.categories
+        df["city_code"] = df["city_code"].cat.set_categories(sorted(cats))
+    logger.info(
+        f"SILVER read: {len(df)} rows, columns={list(df.columns)}, filter={flt}"
+    )
+    return df
+
+
+def anti_join(df: pd.DataFrame, other: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """Rows of df whose keys do not appear in other."""
+    idx = pd.MultiIndex.from_frame(df[keys])
+    drop = pd.MultiIndex.from_frame(other[keys].drop_duplicates())
+    return df[~idx.isin(drop)]
@@ -0,0 +1,127 @@
+import os
+import logging
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Compact on-disk schema shared by SILVER (clean/, silver/) and GOLD parquet:
+# - city_code → dictionary-encoded (category on read). Other strings (run_date,
+#   month) are dictionary-encoded by parquet on disk and read back as str.
+# - date → date32 (4 bytes, no time part)
+# - float metrics → float32. Every stored metric has at most STORED_DECIMALS
+#   decimals (API values are 0.1, temp_avg 0.05, GOLD is rounded to 0.1), which
+#   float32 keeps exactly enough to round back to the same float64 on read.
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+PARQUET_ROW_GROUP_ROWS = int(os.getenv("PARQUET_ROW_GROUP_ROWS", "256000"))
+STORED_DECIMALS = 2
+DICTIONARY_COLUMNS = {"city_code"}
+
+
+def compact_schema(schema: pa.Schema) -> pa.Schema:
+    """Storage types for a frame's arrow schema (see module comment)."""
+    fields = []
+    for field in schema:
+        if field.name in DICTIONARY_COLUMNS:
+            field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+        elif field.name == "date":
+            field = field.with_type(pa.date32())
+        elif pa.types.is_floating(field.type):
+            field = field.with_type(pa.float32())
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def to_compact_table(df: pd.DataFrame) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # pandas metadata would describe the pre-cast dtypes: drop it
+    return table.cast(compact_schema(table.schema)).replace_schema_metadata(None)
+
+
+def write_compact(df: pd.DataFrame, path: str) -> None:
+    """Write a frame with the compact schema (atomic: tmp file + rename)."""
+    write_compact_table(to_compact_table(df), path)
+
+
+def write_compact_table(table: pa.Table, path: str) -> None:
+    """Write an arrow table already in the compact schema, like write_compact."""
+    pq.write_table(
+        table,
+        path + ".tmp",
+        compression=PARQUET_COMPRESSION,
+        row_group_size=PARQUET_ROW_GROUP_ROWS,
+    )
+    os.replace(path + ".tmp", path)
+
+
+def restore_metrics(df: pd.DataFrame, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    float32 metrics back to the float64 values they were written from
+    (widen + round to STORED_DECIMALS). Only float32 columns unless `columns` is given.
+    """
+    if columns is None:
+        columns = [c for c in df.columns if df[c].dtype == "float32"]
+    for col in columns:
+        df[col] = df[col].astype("float64").round(STORED_DECIMALS)
+    return df
+
+
+def read_compact(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Read one compact parquet file: datetime64 dates and float64 metrics."""
+    df = pq.read_table(path, columns=columns).to_pandas(date_as_object=False)
+    if "date" in df.columns:
+        df["date"] = df["date"].astype("datetime64[ns]")
+    return restore_metrics(df)
+
+
+class ParquetAppender:
+    """
+    Append frames to one parquet file, one row group per write, so a large
+    output is written batch by batch without holding it all in memory.
+    compact=False keeps the frame's own types (no float32 / date32).
+    The file appears (atomically) on close; nothing is left behind on error.
+    """
+
+    def __init__(self, path: str, compact: bool = True):
+        self.path = path
+        self.compact = compact
+        self.rows = 0
+        self._writer: pq.ParquetWriter | None = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.compact:
+            table = to_compact_table(df)
+        else:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata(None)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(
+                self.path + ".tmp", table.schema, compression=PARQUET_COMPRESSION
+            )
+        elif table.schema != self._writer.schema:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_ROWS)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self.path + ".tmp", self.path)
+            self._writer = None
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            os.remove(self.path + ".tmp")
+            self._writer = None
+
+    def __enter__(self) -> "ParquetAppender":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,238 @@
+import argparse
+import os
+import sys
+import logging
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from pipeline.metrics import file_bytes, track, write_metrics
+from transformations.clean_weather import SAMPLE_ROWS, write_clean, write_sample
+from transformations.silver_store import silver_paths
+from transformations.storage import (
+    restore_metrics,
+    to_compact_table,
+    write_compact_table,
+)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Plausibility bounds (records: -89.2 °C, 56.7 °C, ~1825 mm in a day)
+TEMP_MIN_C = float(os.getenv("VALIDATE_TEMP_MIN_C", "-90"))
+TEMP_MAX_C = float(os.getenv("VALIDATE_TEMP_MAX_C", "60"))
+PRECIP_MAX_MM = float(os.getenv("VALIDATE_PRECIP_MAX_MM", "2000"))
+
+REQUIRED_COLUMNS = ["city_code", "date", "temp_max", "temp_min", "precip_mm"]
+
+
+def _outside(col: str, lo: float, hi: float) -> pc.Expression:
+    return (pc.field(col) < lo) | (pc.field(col) > hi)
+
+
+# Row rules: rule id → Arrow expression, true on the rows that fail it. All of
+# them are evaluated over whole columns in one scan. A missing (null / NaN)
+# metric is not a failure: comparisons with it are never true.
+ROW_RULES: dict[str, pc.Expression] = {
+    # Unparseable dates come out of clean_weather as NaT (errors="coerce")
+    "key_missing": pc.field("city_code").is_null() | pc.field("date").is_null(),
+    "temp_min_gt_max": pc.field("temp_min") > pc.field("temp_max"),
+    "temp_out_of_range": _outside("temp_min", TEMP_MIN_C, TEMP_MAX_C)
+    | _outside("temp_max", TEMP_MIN_C, TEMP_MAX_C),
+    "precip_negative": pc.field("precip_mm") < 0,
+    "precip_out_of_range": pc.field("precip_mm") > PRECIP_MAX_MM,
+}
+# (city_code, date) already seen in the same run: the first row is kept.
+# Overlaps between runs are expected (every run re-pulls the trailing days) and
+# resolved downstream: compaction keeps the last run, GOLD averages the runs.
+DUPLICATE_RULE = "duplicate_key"
+RULES = [*ROW_RULES, DUPLICATE_RULE]
+
+
+def rule_masks(table: pa.Table) -> dict[str, np.ndarray]:
+    """Failing-row mask of every rule (RULES order) over a SILVER table."""
+    missing = set(REQUIRED_COLUMNS) - set(table.column_names)
+    if missing:
+        raise ValueError(f"Missing required columns for validation: {missing}")
+    flags = ds.dataset(table).to_table(columns=ROW_RULES)
+    masks = {rid: pc.fill_null(flags[rid], False).to_numpy() for rid in ROW_RULES}
+    keys = table.select(["city_code", "date"]).to_pandas(date_as_object=False)
+    masks[DUPLICATE_RULE] = keys.duplicated().to_numpy() & ~masks["key_missing"]
+    return masks
+
+
+def quarantine_table(table: pa.Table, masks: dict[str, np.ndarray]) -> pa.Table:
+    """
+    One row per (failing row, rule), grouped by rule: the row's columns plus
+    rule_id and row (its position in the input, shared by all its failures).
+    """
+    parts = []
+    for rid, mask in masks.items():
+        idx = np.flatnonzero(mask)
+        parts.append(
+            table.take(idx)
+            .append_column("rule_id", pa.repeat(pa.scalar(rid), len(idx)))
+            .append_column("row", pa.array(idx, pa.int64()))
+        )
+    return pa.concat_tables(parts)
+
+
+def validate_table(table: pa.Table) -> tuple[np.ndarray, pa.Table, dict[str, int]]:
+    """(rows failing any rule, quarantine table, failing rows per rule)."""
+    masks = rule_masks(table)
+    bad = np.logical_or.reduce(list(masks.values()))
+    counts = {rid: int(mask.sum()) for rid, mask in masks.items()}
+    return bad, quarantine_table(table, masks), counts
+
+
+def validate_frame(df: pd.DataFrame) -> tuple[pd.DataFrame, pa.Table, dict[str, int]]:
+    """
+    validate_table for a CLEAN frame held in memory (pipeline runner). Rules see
+    the compact schema, as when validating the file. Returns the valid rows with
+    the frame's own dtypes, the quarantine table and the counts per rule.
+    """
+    bad, quarantine, counts = validate_table(to_compact_table(df))
+    return df[~bad].reset_index(drop=True), quarantine, counts
+
+
+def quarantine_path(base_dir: str, run_date: str) -> str:
+    return os.path.join(base_dir, "quarantine", run_date, "weather.parquet")
+
+
+def write_quarantine(quarantine: pa.Table, run_date: str) -> str:
+    """
+    Save data/quarantine/<run_date>/weather.parquet, also when empty: a
+    quarantine file newer than the CLEAN parquet marks the partition validated.
+    """
+    BASE_DIR = os.getenv("DATA_DIR", "./data")
+    path = quarantine_path(BASE_DIR, run_date)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_compact_table(quarantine, path)
+    return path
+
+
+def write_validated(df: pd.DataFrame, quarantine: pa.Table, run_date: str) -> str:
+    """CLEAN partition with the valid rows, then its quarantine (see above)."""
+    out = write_clean(df, run_date)
+    write_quarantine(quarantine, run_date)
+    return out
+
+
+def _is_validated(base_dir: str, run_date: str) -> bool:
+    clean = os.path.join(base_dir, "clean", run_date, "weather.parquet")
+    out = quarantine_path(base_dir, run_date)
+    return os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(clean)
+
+
+def log_counts(run_date: str, rows: int, counts: dict[str, int]) -> None:
+    """Log the failures per rule of a validated partition."""
+    for rid, n in counts.items():
+        if n:
+            logger.warning(f"Validation {run_date}: {rid} failed on {n} rows")
+    logger.info(f"Validation {run_date}: {rows} rows, failures per rule {counts}")
+
+
+def validate_weather(run_date: str | None = None, force: bool = False) -> dict:
+    """
+    Check a CLEAN partition (default: latest) against RULES:
+      - failing rows go to data/quarantine/<run_date>/weather.parquet with the
+        id of every rule they failed, and are removed from the CLEAN parquet
+      - counts per rule are logged and recorded in the stage metrics
+      - a partition already validated (quarantine newer than CLEAN) is skipped
+        unless force=True
+    """
+    BASE_DIR = os.getenv("DATA_DIR", "./data")
+    logger.info("Starting validate_weather()")
+    paths = silver_paths(BASE_DIR)
+    if run_date is None:
+        if not paths:
+            raise FileNotFoundError("No CLEAN partitions found")
+        run_date = os.path.basename(os.path.dirname(paths[-1]))
+    with track("validate") as rec:
+        summary = validate_partition(BASE_DIR, run_date, force, rec)
+    write_metrics(BASE_DIR, run_date, "validate")
+    return summary
+
+
+def validate_partition(base_dir: str, run_date: str, force: bool, rec: dict) -> dict:
+    """
+    validate_weather for one CLEAN partition under base_dir, with the stage's
+    metrics record `rec` (pipeline runner). A missing partition is logged and
+    reported with status "missing", a 0-row one with status "empty".
+    """
+    path = os.path.join(base_dir, "clean", run_date, "weather.parquet")
+    summary: dict = {"run_date": run_date, "status": "skipped", "rows": None}
+    if not os.path.exists(path):
+        logger.warning(f"No CLEAN partition for {run_date}: {path} not found")
+        summary["status"] = "missing"
+        return summary
+    if not force and _is_validated(base_dir, run_date):
+        logger.info(f"CLEAN {run_date} already validated")
+        return summary
+
+    table = pq.read_table(path)
+    rec.update(rows_in=table.num_rows, bytes_read=file_bytes(path))
+    if table.num_rows == 0:
+        # Empty RAW days used to be written as 0-row files without columns;
+        # nothing to check (missing_columns skips them the same way)
+        logger.info(f"CLEAN {run_date} is empty: nothing to validate")
+        summary.update(status="empty", rows=0)
+        return summary
+    with track("validate.rules", rows_in=table.num_rows) as step:
+        bad, quarantine, counts = validate_table(table)
+        step["rows_out"] = quarantined = int(bad.sum())
+    if quarantined:
+        # Only the valid rows go on to compaction / GOLD
+        with track("validate.write", rows_in=table.num_rows - quarantined):
+            valid = table.filter(pa.array(~bad))
+            write_compact_table(valid, path)
+            sample = valid.slice(0, SAMPLE_ROWS).to_pandas(date_as_object=False)
+            write_sample(restore_metrics(sample), os.path.dirname(path))
+    write_quarantine(quarantine, run_date)
+    log_counts(run_date, table.num_rows, counts)
+
+    rec.update(rows_out=table.num_rows - quarantined, quarantined=quarantined)
+    rec["rules"] = counts
+    summary.update(
+        status="validated", rows=table.num_rows, quarantined=quarantined, rules=counts
+    )
+    return summary
+
+
+def validate_all(force: bool = False) -> list[dict]:
+    """
+    validate_weather over every CLEAN partition. A partition that fails is
+    logged and reported with status "error"; the next ones are still checked.
+    """
+    summaries = []
+    for p in silver_paths(os.getenv("DATA_DIR", "./data")):
+        run_date = os.path.basename(os.path.dirname(p))
+        try:
+            summaries.append(validate_weather(run_date, force=force))
+        except Exception:
+            logger.exception(f"Validation {run_date} failed")
+            summaries.append({"run_date": run_date, "status": "error", "rows": None})
+    return summaries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate CLEAN (silver) partitions")
+    parser.add_argument("--run-date", help="CLEAN partition to check (default: latest)")
+    parser.add_argument(
+        "--all", action="store_true", help="Check every CLEAN partition"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Also re-check validated partitions"
+    )
+    args = parser.parse_args()
+    if args.all:
+        if any(s["status"] == "error" for s in validate_all(force=args.force)):
+            sys.exit(1)
+    else:
+        validate_weather(args.run_date, force=args.force)